@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+######################################################
+#  analytics.py
+#
+#   since 18/10/2026
+#
+#  rankings and statistics of the results, with numpy
+#   (pip3 install numpy), all at once on whole columns:
+#    * game x genre matrix, and the genre groups of
+#       settings.GENRE_GROUPS as Y/N columns
+#    * metascore vs. userscore delta, and a score
+#       weighted by the number of reviews
+#    * averages per genre, genre group, developer
+#
+#    python3 analytics.py [results.csv]
+#       (default: the newest csv in downloadsFolder)
+######################################################
+
+import sys
+import numpy
+from resultstable import ResultsTable, exportResults, newestResults
+from settings import GENRE_GROUPS, RESULTS_FORMATS, downloadsFolder
+
+OTHER = "Other" # group of the genres that are in no GENRE_GROUPS
+
+SCORES = ["metascore", "userscore", "weighted", "delta"]
+
+
+class Library(object):
+    """
+    the numbers of a ResultsTable as numpy arrays; 0 scores ("tbd") become NaN.
+    All scores are on the metacritic scale 0..100, the userscore times 10.
+    """
+
+    def __init__(self, table, genreGroups=GENRE_GROUPS):
+        self.table = table
+        self.games = numpy.array(table.column("game"), dtype=object)
+        self.metascore = numpy.where(table.numpy("metascore") > 0, table.numpy("metascore"), numpy.nan)
+        self.userscore = numpy.where(table.numpy("userscore") > 0, table.numpy("userscore") * 10, numpy.nan)
+        # reviews behind each score; a negative userscoreBased is "awaiting n more ratings"
+        self.metascoreBased = numpy.where(numpy.isnan(self.metascore), 0, table.numpy("metascoreBased").clip(0))
+        self.userscoreBased = numpy.where(numpy.isnan(self.userscore), 0, table.numpy("userscoreBased").clip(0))
+
+        # positive = critics liked it more than the users
+        self.delta = self.metascore - self.userscore
+        reviews = self.metascoreBased + self.userscoreBased
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            self.weighted = (numpy.nan_to_num(self.metascore) * self.metascoreBased +
+                             numpy.nan_to_num(self.userscore) * self.userscoreBased) / reviews
+
+        self.genres, self.genreMatrix = genreMatrix(table.column("genres"))
+        self.groups, groupOfGenre = groupMatrix(self.genres, genreGroups)
+        self.groupMatrix = (self.genreMatrix.astype(numpy.int32) @ groupOfGenre) > 0
+
+    def scores(self):
+        """all SCORES as the columns of one (games x 4) array"""
+        return numpy.column_stack([getattr(self, name) for name in SCORES])
+
+    def ranking(self, score="weighted", descending=True):
+        """row indices, best first; games without that score last"""
+        values = getattr(self, score)
+        return numpy.argsort(-values if descending else values, kind="stable")
+
+    def top(self, score="weighted", n=10, descending=True):
+        """[(game, score)] of the n best"""
+        values = getattr(self, score)
+        order = self.ranking(score, descending)[:n]
+        return [(self.games[i], values[i]) for i in order if not numpy.isnan(values[i])]
+
+    def byGenre(self):
+        return aggregate(self.genreMatrix, self.genres, self.scores())
+
+    def byGroup(self):
+        return aggregate(self.groupMatrix, self.groups, self.scores())
+
+    def byDeveloper(self):
+        names, inverse = numpy.unique(numpy.array(self.table.column("developer"), dtype=str), return_inverse=True)
+        return aggregateByKey(inverse, names, self.scores())
+
+    def withGenreGroups(self):
+        """the table plus one Y/N column per genre group"""
+        table = self.table.take(range(len(self.table)))
+        for j, group in enumerate(self.groups):
+            table.addColumn(group, numpy.where(self.groupMatrix[:, j], "Y", "N"))
+        return table
+
+
+def genreMatrix(genreColumn):
+    """sorted genre names, and the (games x genres) boolean matrix"""
+    genreLists = [[genre for genre in genres.split(",") if genre] for genres in genreColumn]
+    genres = sorted(set(genre for genreList in genreLists for genre in genreList))
+    column = {genre: j for j, genre in enumerate(genres)}
+    rows = [i for i, genreList in enumerate(genreLists) for genre in genreList]
+    cols = [column[genre] for genreList in genreLists for genre in genreList]
+    matrix = numpy.zeros((len(genreLists), len(genres)), dtype=bool)
+    matrix[rows, cols] = True
+    return genres, matrix
+
+
+def groupMatrix(genres, genreGroups):
+    """group names (plus OTHER), and the (genres x groups) 0/1 matrix"""
+    groups = list(genreGroups) + [OTHER]
+    matrix = numpy.zeros((len(genres), len(groups)), dtype=numpy.int32)
+    for i, genre in enumerate(genres):
+        inGroups = [j for j, group in enumerate(genreGroups) if genre in genreGroups[group]]
+        matrix[i, inGroups or [len(groups) - 1]] = 1
+    return groups, matrix
+
+
+def aggregate(membership, labels, scores):
+    """
+    per column of the (games x labels) membership matrix: number of games,
+    and the mean of each score over the games that have it; two matrix products.
+    """
+    valid = ~numpy.isnan(scores)
+    member = membership.astype(numpy.float64)
+    sums = member.T @ numpy.where(valid, scores, 0)
+    counts = member.T @ valid
+    with numpy.errstate(invalid="ignore"):
+        means = sums / counts
+    return labels, membership.sum(axis=0), means
+
+
+def aggregateByKey(inverse, labels, scores):
+    """like aggregate, but each game has exactly one key, e.g. its developer"""
+    valid = ~numpy.isnan(scores)
+    counts = numpy.bincount(inverse, minlength=len(labels))
+    with numpy.errstate(invalid="ignore"):
+        means = numpy.column_stack([
+            numpy.bincount(inverse, numpy.where(valid[:, k], scores[:, k], 0), len(labels)) /
+            numpy.bincount(inverse, valid[:, k], len(labels))
+            for k in range(scores.shape[1])])
+    return labels, counts, means
+
+
+def printAggregate(title, aggregated, minGames=1, n=None):
+    labels, counts, means = aggregated
+    print("\n%s:\n%-30s %6s %s" % (title, "", "games", " ".join("%9s" % s for s in SCORES)))
+    order = numpy.argsort(-numpy.nan_to_num(means[:, SCORES.index("weighted")], nan=-1), kind="stable")
+    shown = [i for i in order if counts[i] >= minGames][:n]
+    for i in shown:
+        print("%-30s %6d %s" % (labels[i][:30], counts[i], " ".join("%9.1f" % m for m in means[i])))
+
+
+def main(resultsFile):
+    table = ResultsTable.fromCsv(resultsFile)
+    library = Library(table)
+    print("%d games, %d genres in %d groups, from '%s'" % (len(table), len(library.genres), len(library.groups), resultsFile))
+
+    print("\nbest, by review-weighted score:")
+    for game, score in library.top("weighted", 10):
+        print("  %5.1f %s" % (score, game))
+    print("\ncritics liked them more than the users:")
+    for game, delta in library.top("delta", 5):
+        print("  %+5.1f %s" % (delta, game))
+    print("\nusers liked them more than the critics:")
+    for game, delta in library.top("delta", 5, descending=False):
+        print("  %+5.1f %s" % (delta, game))
+
+    printAggregate("per genre group", library.byGroup())
+    printAggregate("per genre (at least 3 games)", library.byGenre(), minGames=3, n=15)
+    printAggregate("per developer (at least 2 games)", library.byDeveloper(), minGames=2, n=15)
+
+    for fn in exportResults(library.withGenreGroups(), resultsFile.replace(".csv", "") + "_groups", RESULTS_FORMATS):
+        print("saved to:", fn)
+
+
+if __name__ == "__main__":
+    resultsFile = sys.argv[1] if len(sys.argv) > 1 else newestResults(downloadsFolder)
+    if not resultsFile:
+        print ("no results yet; run filesparser.py first, or: python3 analytics.py results.csv")
+        sys.exit(1)
+    main(resultsFile)
@@ -0,0 +1,726 @@
+#!/usr/bin/env python3
+
+######################################################
+#  benchmark.py
+#
+#   since 18/10/2026
+#
+#  measures the stages of this tool, offline:
+#
+#    python3 benchmark.py parsers
+#       html5lib vs lxml backend: every field must be
+#        equal (parity), and how many pages per second
+#
+#    python3 benchmark.py fields
+#       the field spec of fieldspec.py vs. the hand-written
+#        parse* functions: same fields (parity), ms per
+#         page, and what is left of broken pages
+#
+#    python3 benchmark.py titles
+#       simplifyTitle must give byte-identical urlpaths
+#        to the plain loops over the rules; microseconds
+#
+#    python3 benchmark.py analytics
+#       rankings and genre statistics of analytics.py
+#        must equal plain loops; milliseconds
+#
+#    python3 benchmark.py slugs
+#       requests per resolved title, guessing urlpaths
+#        vs. the fuzzy slug resolver; no wrong matches,
+#         e.g. no sequel or remaster taken for the original
+#
+#    python3 benchmark.py rates
+#       adaptive rate vs. fixed NICENESS, against a
+#        server that answers 429 above some rate
+#
+#    python3 benchmark.py refresh
+#       refresh.py vs. a full re-crawl: requests, bytes;
+#        the ratings must equal a full parse afterwards
+#
+#    python3 benchmark.py startup
+#       milliseconds until each subcommand of
+#        epicratings.py can start, and which heavy
+#         modules it imported, vs. importing all at once
+######################################################
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+import argparse
+import fieldspec
+import filesparser
+import fakemetacritic
+from settings import pageStore, platformsOrdered, epicHistoryFile, CONCURRENCY, PARSER_BACKEND
+from pagestore import openPageStore
+
+BACKENDS = ["html5lib", "lxml"]
+
+
+def loadPages(folder, platforms, synthetic):
+    """[(platform, game, page)] = saved pages in folder (if any), plus some synthetic ones"""
+    pages = []
+    if os.path.exists(folder):
+        store = openPageStore(folder)
+        for platform, urlpath in store.keys(platforms):
+            pages.append((platform, urlpath, store.get(platform, urlpath)))
+        store.close()
+    for i in range(synthetic):
+        platform, game = platforms[i % len(platforms)], "synthetic-game-%d" % i
+        pages.append((platform, game, fakemetacritic.fakePage(platform, game)))
+    return pages
+
+
+def parseAll(pages, backend):
+    """results (or the exception) per page, and the seconds it took"""
+    results = []
+    started = time.perf_counter()
+    for platform, game, page in pages:
+        try:
+            results.append(filesparser.parsePage(page, platform, game, backend))
+        except Exception as e:
+            results.append(e)
+    return results, time.perf_counter() - started
+
+
+def compareResults(pages, reference, results):
+    """list of mismatches "game: field reference!=result" """
+    mismatches = []
+    for (platform, game, _), ref, res in zip(pages, reference, results):
+        if isinstance(ref, Exception) or isinstance(res, Exception):
+            if type(ref) != type(res):
+                mismatches.append("%s_%s: %r != %r" % (platform, game, ref, res))
+            continue
+        for field in sorted(set(ref) | set(res)):
+            if ref.get(field) != res.get(field):
+                mismatches.append("%s_%s: %s %r != %r" % (platform, game, field, ref.get(field), res.get(field)))
+    return mismatches
+
+
+def benchmarkParsers(args):
+    pages = loadPages(args.folder, platformsOrdered, args.synthetic)
+    print("%d pages, %.1f MB" % (len(pages), sum(len(p[2]) for p in pages) / 1e6))
+    reference = None
+    allEqual = True
+    for name in BACKENDS:
+        try:
+            backend = filesparser.parserBackend(name)
+        except ImportError as e:
+            print("%-10s skipped: %s" % (name, e))
+            continue
+        results, seconds = parseAll(pages, backend)
+        line = "%-10s %8.1f pages/s" % (name, len(pages) / seconds)
+        if reference is None:
+            reference = results
+        else:
+            mismatches = compareResults(pages, reference, results)
+            allEqual = allEqual and not mismatches
+            line += "  parity: %s" % ("OK" if not mismatches else "%d MISMATCHES" % len(mismatches))
+            for m in mismatches[:20]:
+                line += "\n    " + m
+        print(line)
+
+    return allEqual
+
+
+# ways a page can be broken: (what, page -> broken page, the fields that must fail; None = unknown)
+MUTILATIONS = [("no Developer:", lambda page: page.replace("Developer:", "Made by:"), {"developer"}),
+               ("no Publisher:", lambda page: page.replace("Publisher:", "Label:"), {"publisher"}),
+               ("no userscore box", lambda page: page.replace("userscore_wrap feature_userscore", "userscore_wrap"),
+                {"userscore", "userscoreBased"}),
+               ("no metascore box", lambda page: page.replace("score_summary metascore_summary", "score_summary"),
+                {"metascore", "metascoreBased"}),
+               ("cut in half", lambda page: page[:len(page) // 2], None)]
+
+
+def benchmarkFields(args):
+    pages = loadPages(args.folder, platformsOrdered, args.synthetic)
+    print("%d pages, %.1f MB; fields of the hand-written parse* functions vs. the fieldspec.py spec\n"
+          % (len(pages), sum(len(p[2]) for p in pages) / 1e6))
+    print("%-10s %-14s %12s %12s  %s" % ("backend", "fields by", "ms/page", "pages/s", "parity"))
+    ok = True
+    for name in BACKENDS:
+        try:
+            backend = filesparser.parserBackend(name)
+            extractor = fieldspec.FieldExtractor(name) # compiled once, like filesparser.fieldExtractor
+        except ImportError as e:
+            print("%-10s skipped: %s" % (name, e))
+            continue
+        makeTree, parseMs, parseUs, parseOther = backend
+        trees = [(makeTree(page), "/game/%s/%s" % (platform, game)) for platform, game, page in pages]
+
+        def handWritten(tree, urlpath):
+            resultsDict = {"userscore": 0, "userscoreBased": 0}
+            parseMs(tree, urlpath, resultsDict)
+            try:
+                parseUs(tree, urlpath, resultsDict)
+            except (AttributeError, IndexError, ValueError):
+                pass
+            parseOther(tree, resultsDict)
+            return resultsDict
+
+        results = {}
+        for label, extract in [("hand-written", handWritten),
+                               ("spec", lambda tree, urlpath: extractor.extract(tree, urlpath)[0])]:
+            seconds = float("inf")
+            for repeat in range(3): # best of three
+                started = time.perf_counter()
+                results[label] = []
+                for tree, urlpath in trees:
+                    try:
+                        results[label].append(extract(tree, urlpath))
+                    except Exception as e:
+                        results[label].append(e)
+                seconds = min(seconds, time.perf_counter() - started)
+            line = "%-10s %-14s %12.3f %12.1f" % (name, label, seconds * 1e3 / len(pages), len(pages) / seconds)
+            if label == "spec":
+                mismatches = compareResults(pages, results["hand-written"], results["spec"])
+                ok = ok and not mismatches
+                line += "  %s" % ("OK" if not mismatches else "%d MISMATCHES" % len(mismatches))
+                for m in mismatches[:10]:
+                    line += "\n    " + m
+            print(line)
+
+        # broken pages: the hand-written functions lose them, the spec keeps the rest of the fields
+        print("\n%-10s %-18s %14s %14s  %s" % (name, "broken pages", "hand-written", "spec", "other fields"))
+        for what, mutilate, mustFail in MUTILATIONS:
+            lost, kept, sameOthers = 0, 0, True
+            for (platform, game, page), good in zip(pages, results["spec"]):
+                urlpath = "/game/%s/%s" % (platform, game)
+                tree = makeTree(mutilate(page))
+                try:
+                    handWritten(tree, urlpath)
+                except Exception:
+                    lost += 1
+                resultsDict, failures = extractor.extract(tree, urlpath)
+                kept += 1
+                if mustFail is not None and not isinstance(good, Exception):
+                    failed = set(failures)
+                    # a field that was empty or 0 anyway may not fail; none other may fail or change
+                    sameOthers = sameOthers and failed <= mustFail and all(
+                        resultsDict[field] == good[field] for field in good if field not in mustFail)
+            ok = ok and kept == len(pages) and sameOthers
+            print("%-10s %-18s %8d lost %8d kept  %s" % ("", what, lost, kept,
+                                                        "-" if mustFail is None else "same" if sameOthers else "CHANGED"))
+        print()
+    return ok
+
+
+def simplifyTitleReference(name, removeChars, replacers, removeSentences, namesMapper, namesIgnorer):
+    """simplifyTitle as it was before the rules got compiled: one pass per rule"""
+    if name in namesIgnorer:
+        return False
+    if name in namesMapper:
+        return namesMapper[name]
+    for sentence in removeSentences:
+        name = name.replace(sentence,"")
+    for rem in removeChars:
+        name = name.replace(rem,"")
+    name=name.lower()
+    name=name.strip()
+    for find, replace in replacers:
+        name = name.replace(find,replace)
+    return name
+
+
+def benchmarkTitles(args):
+    import csv
+    import random
+    import downloader
+    from settings import REMOVE_CHARS, REPLACERS, REMOVE_SENTENCES, NAMES_MAPPER, NAMES_IGNORER
+    rules = (REMOVE_CHARS, REPLACERS, REMOVE_SENTENCES, NAMES_MAPPER, NAMES_IGNORER)
+
+    # golden: the example purchase history, and every title the settings mention
+    myCsv = downloader.readEpicgamesPurchaseHistoryFile(args.history)
+    golden = [row[1] for row in csv.reader(myCsv[1:], delimiter="\t") if len(row) > 1]
+    golden += list(NAMES_MAPPER) + list(NAMES_IGNORER)
+    # plus made-up titles; some contain the characters, replacers and sentences
+    rnd = random.Random(0)
+    words = ["Edge", "of", "the", "Epic", "Ep", "Tale", "2", "Saga", "Dark", "Star", "Quest"]
+    specials = list(REMOVE_CHARS) + [find for find, _ in REPLACERS]
+    synthetic = [" ".join(rnd.choice(words if rnd.random() < 0.9 else specials) for _ in range(rnd.randint(1, 6)))
+                 + (rnd.choice(REMOVE_SENTENCES) if rnd.random() < 0.05 else "") for _ in range(args.titles)]
+
+    mismatches = [(name, simplifyTitleReference(name, *rules), downloader.simplifyTitle(name))
+                  for name in golden + synthetic
+                  if simplifyTitleReference(name, *rules) != downloader.simplifyTitle(name)]
+    print("golden: %d titles from %s and settings.py, %d synthetic: %s" %
+          (len(golden), args.history, len(synthetic), "identical" if not mismatches else "%d MISMATCHES" % len(mismatches)))
+    for m in mismatches[:20]:
+        print("    %r: %r != %r" % m)
+
+    # speed, with the rule lists grown by some made-up exceptions
+    grown = (REMOVE_CHARS, REPLACERS, REMOVE_SENTENCES + [" - Made Up DLC %d" % i for i in range(args.rules)],
+             NAMES_MAPPER, NAMES_IGNORER + ["Made Up Pack %d" % i for i in range(args.rules)])
+    print("speed with %d more sentences and ignored names:" % args.rules)
+    rules = grown
+    started = time.perf_counter()
+    for name in synthetic:
+        simplifyTitleReference(name, *rules)
+    reference = time.perf_counter() - started
+    compiled = downloader.TitleRules(*rules)
+    started = time.perf_counter()
+    for name in synthetic:
+        compiled.compute(name)
+    uncached = time.perf_counter() - started
+    started = time.perf_counter()
+    for name in synthetic:
+        compiled.simplify(name)
+    compiled.memo.clear()
+    started2 = time.perf_counter()
+    for name in synthetic + synthetic:
+        compiled.simplify(name)
+    memoised = (time.perf_counter() - started2) / 2
+    for label, seconds in [("one pass per rule", reference), ("compiled", uncached),
+                           ("compiled + memo, each title twice", memoised)]:
+        print("%-35s %8.2f us/title" % (label, seconds * 1e6 / len(synthetic)))
+    return not mismatches
+
+
+def analyticsReference(filename2results):
+    """review-weighted score per game, and its mean per genre, with plain loops over the dicts"""
+    weighted, perGenre = {}, {}
+    for key, r in filename2results.items():
+        ms = r["metascore"] if r["metascore"] > 0 else None
+        us = r["userscore"] * 10 if r["userscore"] > 0 else None
+        msN = max(0, r["metascoreBased"]) if ms else 0
+        usN = max(0, r["userscoreBased"]) if us else 0
+        if msN + usN == 0:
+            continue
+        weighted[key] = ((ms or 0) * msN + (us or 0) * usN) / (msN + usN)
+        for genre in set(r["genres"].split(",")) - {""}:
+            perGenre.setdefault(genre, []).append(weighted[key])
+    ranking = sorted(weighted, key=weighted.get, reverse=True)
+    return ranking, {genre: sum(values) / len(values) for genre, values in perGenre.items()}
+
+
+def benchmarkAnalytics(args):
+    import random
+    import analytics
+    from resultstable import ResultsTable
+    from settings import COLUMN_ORDER
+    rnd = random.Random(0)
+    filename2results = {}
+    for i in range(args.titles):
+        filename2results["game-%d_pc" % i] = dict(
+            game="game-%d" % i, platform="pc", metascore=rnd.choice([0, rnd.randint(20, 99)]),
+            metascoreBased=rnd.randint(0, 150), userscore=rnd.choice([0, rnd.randint(10, 99) / 10]),
+            userscoreBased=rnd.randint(-3, 9000), nops="", released="", publisher="",
+            developer=rnd.choice(fakemetacritic.COMPANIES),
+            genres=",".join(g.replace(" ", "") for g in rnd.sample(fakemetacritic.GENRES, rnd.randint(0, 5))))
+
+    started = time.perf_counter()
+    ranking, perGenre = analyticsReference(filename2results)
+    reference = time.perf_counter() - started
+
+    table = ResultsTable.fromResults(filename2results, COLUMN_ORDER)
+    started = time.perf_counter()
+    library = analytics.Library(table)
+    built = time.perf_counter()
+    order = library.ranking("weighted")
+    genres, counts, means = library.byGenre()
+    library.byGroup(), library.byDeveloper(), library.ranking("delta")
+    vectorised = time.perf_counter() - built
+
+    rankedKeys = ["%s_pc" % library.games[i] for i in order[:len(ranking)]]
+    weightedOf = dict(zip(genres, means[:, analytics.SCORES.index("weighted")]))
+    same = (rankedKeys == ranking and
+            all(abs(weightedOf[genre] - mean) < 1e-9 for genre, mean in perGenre.items()))
+    print("%d titles: %s" % (args.titles, "identical ranking and genre means" if same else "MISMATCH"))
+    for label, seconds in [("plain loops over the dicts", reference), ("Library from the table", built - started),
+                           ("rankings + genre/group/developer stats", vectorised)]:
+        print("%-40s %8.2f ms" % (label, seconds * 1e3))
+    return same
+
+
+def downloadScenario(workdir, history, server, threshold, slugList, concurrency, nice=0, metrics=None):
+    """DownloadPages of that history into an empty workdir; returns (games, failedDownloads, requests)"""
+    import downloader
+    from metrics import NO_METRICS
+    os.makedirs(workdir)
+    here = os.getcwd()
+    os.chdir(workdir)
+    downloader.metacriticUrl = server.url
+    downloader.FUZZY_THRESHOLD, downloader.slugListFile = threshold, slugList
+    before = len(server.requests)
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        games = list(downloader.iterDownloadList(downloader.iterEpicgamesPurchaseHistoryFile(history)))
+        failedDownloads = downloader.DownloadPages(games, printInfos=False, nice=nice, concurrency=concurrency,
+                                                   metrics=metrics or NO_METRICS)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        os.chdir(here)
+    return games, failedDownloads, len(server.requests) - before
+
+
+def benchmarkSlugs(args):
+    import random
+    import downloader
+    workdir = tempfile.mkdtemp(prefix="epic-ratings-benchmark-")
+    # metacritic knows the base titles, and half of the sequels/remasters. The purchase history has
+    # editions, demos, ... of some (their base title is right), and sequels/remasters of others:
+    # those must get their own page, or none if metacritic doesn't have it, never the original's
+    bases, expected, sequels = [], [], []
+    for i in range(args.titles):
+        kind, suffix = fakemetacritic.titleVariant(i, args.variants, args.sequels)
+        bases.append(downloader.simplifyTitle(fakemetacritic.baseTitle(i)))
+        if kind == "sequel":
+            own = downloader.simplifyTitle(fakemetacritic.baseTitle(i) + suffix)
+            sequels.append(i)
+            expected.append(own if random.Random("sequel %d" % i).random() < 0.5 else None)
+        else:
+            expected.append(bases[-1])
+    history, slugList = os.path.join(workdir, "history.txt"), os.path.join(workdir, "slugs.txt")
+    fakemetacritic.fakePurchaseHistory(history, args.titles, variantRate=args.variants, sequelRate=args.sequels)
+    with open(slugList, "w") as f: # e.g. from a sitemap, too old for the sequels: where each base game is
+        for urlpath in bases:
+            for platform in fakemetacritic.platformsOf(urlpath, platformsOrdered, args.miss_rate):
+                f.write("%s/%s\n" % (platform, urlpath))
+    catalogue = set(bases) | set(urlpath for urlpath in expected if urlpath)
+    server = fakemetacritic.FakeMetacriticServer(platformsOrdered, args.miss_rate, kilobytes=5,
+                                                 catalogue=catalogue).start()
+    print("%d titles, %.0f%% of them editions/demos/..., %d sequels/remasters (%d of them on metacritic);"
+          " each game on a platform with %.0f%% chance" % (args.titles, args.variants * 100, len(sequels),
+          sum(1 for i in sequels if expected[i]), (1 - args.miss_rate) * 100))
+    print("%-28s %9s %9s %9s %16s" % ("", "requests", "resolved", "wrong", "requests/resolved"))
+    results = []
+    try:
+        for label, threshold, slugs in [("guess only", None, None),
+                                        ("fuzzy %.2f + slug list" % args.threshold, args.threshold, slugList)]:
+            games, failedDownloads, requests = downloadScenario(os.path.join(workdir, label.replace(" ", "_")),
+                                                                history, server, threshold, slugs, args.concurrency)
+            failed = set(game[1] for game in failedDownloads)
+            resolved = [(game, slug) for game, slug in zip(games, expected) if game[1] not in failed]
+            wrong = [(game[1], game[4]) for game, slug in resolved if game[4] != slug] # also: found, but should not be
+            print("%-28s %9d %9d %9d %16.2f" % (label, requests, len(resolved), len(wrong),
+                                                 requests / max(1, len(resolved))))
+            for title, urlpath in wrong[:5]:
+                print("    WRONG: %r -> %s" % (title, urlpath))
+            results.append((requests / max(1, len(resolved)), len(wrong)))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir)
+    return results[-1][0] < results[0][0] and not any(wrong for _, wrong in results)
+
+
+def benchmarkRates(args):
+    import downloader
+    from metrics import Metrics
+    workdir = tempfile.mkdtemp(prefix="epic-ratings-benchmark-")
+    history = os.path.join(workdir, "history.txt")
+    fakemetacritic.fakePurchaseHistory(history, args.titles)
+    server = fakemetacritic.FakeMetacriticServer(platformsOrdered, args.miss_rate, latency=args.latency, kilobytes=5,
+                                                 maxRate=args.max_rate, retryAfter=args.retry_after).start()
+    limiters = [] # to read the rate each run ended with
+    makeRateLimiter = downloader.makeRateLimiter
+    downloader.makeRateLimiter = lambda nice: limiters.append(makeRateLimiter(nice)) or limiters[-1]
+    print("%d titles; the server answers 429 (Retry-After: %ss) above %.1f requests/s; %d threads; ceiling %.1f/s\n"
+          % (args.titles, args.retry_after, args.max_rate, args.concurrency, downloader.RATE_CEILING))
+    print("%-26s %8s %9s %6s %8s %8s %11s" % ("", "seconds", "requests", "429", "saved", "failed", "rate at end"))
+    results = {}
+    try:
+        for label, adaptive, nice in [("fixed NICENESS %.1f" % args.niceness, False, args.niceness),
+                                      ("no limit", False, 0),
+                                      ("adaptive (AIMD)", True, args.niceness)]:
+            downloader.ADAPTIVE_RATE = adaptive
+            metrics = Metrics()
+            throttledBefore, started = server.throttled, time.perf_counter()
+            games, failedDownloads, requests = downloadScenario(os.path.join(workdir, label.replace(" ", "_")),
+                                                                history, server, None, None, args.concurrency,
+                                                                nice=nice, metrics=metrics)
+            seconds = time.perf_counter() - started
+            rates = limiters[-1].rates() if limiters else {}
+            saved = metrics.counters.get("pages: saved", 0)
+            print("%-26s %8.1f %9d %6d %8d %8d %11s" % (label, seconds, requests, server.throttled - throttledBefore,
+                                                         saved, len(failedDownloads),
+                                                         "%.2f/s" % max(rates.values()) if rates and nice else "-"))
+            results[label] = (seconds, saved)
+    finally:
+        downloader.makeRateLimiter = makeRateLimiter
+        server.shutdown()
+        shutil.rmtree(workdir)
+    fixed, adaptive = results["fixed NICENESS %.1f" % args.niceness], results["adaptive (AIMD)"]
+    # as many pages as with the fixed sleep (none lost to 429), in less time
+    return adaptive[1] == fixed[1] and adaptive[0] < fixed[0]
+
+
+def benchmarkRefresh(args):
+    import random
+    import refresh
+    from metrics import NO_METRICS
+    workdir = tempfile.mkdtemp(prefix="epic-ratings-benchmark-")
+    server = fakemetacritic.FakeMetacriticServer(platformsOrdered, args.miss_rate, kilobytes=args.kilobytes,
+                                                 changeRate=args.change_rate, cosmeticRate=args.cosmetic_rate).start()
+    here, stdout = os.getcwd(), sys.stdout
+    try:
+        os.chdir(workdir)
+        fakemetacritic.fakePurchaseHistory("history.txt", args.titles)
+        sys.stdout = open(os.devnull, "w")
+        import downloader
+        downloader.metacriticUrl = refresh.metacriticUrl = server.url
+
+        # full crawl, and parse, as the downloader and filesparser do
+        started = time.perf_counter()
+        downloader.DownloadPages(downloader.iterDownloadList(downloader.iterEpicgamesPurchaseHistoryFile("history.txt")),
+                                 printInfos=False, nice=0, concurrency=args.concurrency, metrics=NO_METRICS)
+        crawl = (len(server.requests), server.bytesSent, time.perf_counter() - started)
+
+        # the pages get some days old (and were parsed meanwhile), and metacritic changes some
+        rnd, now = random.Random(0), time.time()
+        store = openPageStore(pageStore)
+        keys = store.keys(platformsOrdered)
+        for platform, urlpath in keys:
+            stored = now - rnd.uniform(0, args.max_age) * 86400
+            os.utime(store.filename(platform, urlpath), (stored, stored))
+        names = ["%s_%s.html" % key for key in keys]
+        filesparser.parseMetacriticFiles(names, pageStore, cache=filesparser.openParseCache(),
+                                         metrics=NO_METRICS)
+        server.generation += 1
+        requestsBefore, bytesBefore = len(server.requests), server.bytesSent
+        started = time.perf_counter()
+        changes = refresh.refresh(nice=0, concurrency=args.concurrency)
+        refreshed = (len(server.requests) - requestsBefore, server.bytesSent - bytesBefore,
+                     time.perf_counter() - started)
+
+        # must be what a full parse of the new pages says
+        fresh = filesparser.parseMetacriticFiles(names, pageStore, metrics=NO_METRICS)
+        cached = filesparser.openParseCache()
+        stale = []
+        for (platform, urlpath), name in zip(keys, names):
+            resultsDict = cached.get(name, store.fingerprint(platform, urlpath)) or {}
+            if any(resultsDict.get(field) != fresh[urlpath + "_" + platform][field] for field in refresh.RATING_FIELDS):
+                stale.append(name)
+        store.close()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        os.chdir(here)
+        server.shutdown()
+        shutil.rmtree(workdir)
+
+    print("%d titles, %d pages of %d KB; pages up to %d days old; after that, %.0f%% with new ratings, %.0f%% other changes"
+          % (args.titles, len(names), args.kilobytes, args.max_age, args.change_rate * 100, args.cosmetic_rate * 100))
+    print("%-14s %9s %9s %9s" % ("", "requests", "MB", "seconds"))
+    for label, (requests, sent, seconds) in [("full crawl", crawl), ("refresh", refreshed)]:
+        print("%-14s %9d %9.2f %9.2f" % (label, requests, sent / 1e6, seconds))
+    print("%d rating changes logged; parse cache after the refresh: %s"
+          % (len(changes), "same ratings as a full parse" if not stale else "%d STALE PAGES" % len(stale)))
+    return not stale
+
+
+HEAVY_MODULES = ["requests", "bs4", "html5lib", "lxml", "numpy", "pyarrow"]
+
+
+def startupSeconds(code, runs):
+    """median wall time of a fresh 'python3 -c code', and the HEAVY_MODULES it imported; None if it failed"""
+    import subprocess
+    import statistics
+    probe = code + "; import sys; print(' '.join(m for m in %r if m in sys.modules))" % HEAVY_MODULES
+    here = os.path.dirname(os.path.abspath(__file__))
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        done = subprocess.run([sys.executable, "-c", probe], cwd=here, capture_output=True, text=True)
+        seconds.append(time.perf_counter() - started)
+        if done.returncode:
+            return None, done.stderr.strip().splitlines()[-1:]
+    return statistics.median(seconds), done.stdout.split()
+
+
+def benchmarkStartup(args):
+    import epicratings
+    everything = sorted(set(name for command in epicratings.COMMANDS for name in epicratings.COMMANDS[command]
+                            if name) | set(epicratings.PARSER_MODULES[args.backend]))
+    rows = [("python3 alone", "pass"),
+            ("all at once", "import " + ", ".join(everything))]
+    rows += [(command, "import epicratings; epicratings.load(%r, %r)" % (command, args.backend))
+             for command in epicratings.COMMANDS]
+    print("ms until a subcommand can start, median of %d fresh interpreters; %s backend\n" % (args.runs, args.backend))
+    print("%-14s %8s  %s" % ("", "ms", "heavy modules imported"))
+    for name, code in rows:
+        seconds, modules = startupSeconds(code, args.runs)
+        if seconds is None:
+            print("%-14s %8s  %s" % (name, "failed", " ".join(modules)))
+        else:
+            print("%-14s %8.1f  %s" % (name, seconds * 1000, " ".join(modules) or "-"))
+
+
+def percentile(values, p):
+    """nearest-rank percentile of a sorted list"""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def stageProcess(stage, workdir, options, queue):
+    """runs downloader.main or filesparser.main in a fresh process, reports seconds and peak RSS"""
+    import resource
+    os.chdir(workdir)
+    sys.stdout = open(os.devnull, "w") # keep the benchmark output readable
+    try:
+        started = time.perf_counter()
+        runStageHere(stage, options)
+        seconds = time.perf_counter() - started
+    except BaseException as e: # the parent waits for an answer
+        queue.put(e)
+        raise
+    queue.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
+
+
+def runStageHere(stage, options):
+    import downloader
+    import filesparser
+    if stage == "download":
+        downloader.metacriticUrl = options["url"]
+        downloader.main("history.txt", printInfos=False,
+                        nice=options["niceness"], concurrency=options["concurrency"])
+    elif stage == "pipeline":
+        import pipeline
+        downloader.metacriticUrl = options["url"]
+        pipeline.main("history.txt", jobs=options["jobs"], backend=options["backend"],
+                      nice=options["niceness"], concurrency=options["concurrency"])
+    else:
+        filesparser.main(pageStore, platformsOrdered, jobs=options["jobs"], backend=options["backend"])
+
+
+def runStage(stage, workdir, options):
+    context = multiprocessing.get_context("spawn") # fresh interpreter, so peak RSS is this stage's
+    queue = context.Queue()
+    process = context.Process(target=stageProcess, args=(stage, workdir, options, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, BaseException):
+        raise RuntimeError("%s stage failed in %s" % (stage, workdir)) from result
+    return result
+
+
+def benchmarkEndToEnd(args):
+    server = fakemetacritic.FakeMetacriticServer(platformsOrdered, missRate=args.miss_rate, latency=args.latency,
+                                                 jitter=args.jitter, kilobytes=args.kilobytes).start()
+    options = dict(url=server.url, niceness=args.niceness, concurrency=args.concurrency,
+                   jobs=args.jobs, backend=args.backend)
+    print("local metacritic at %s: %.0f%% missing per platform, latency %.0f+%.0f ms, %d KB pages"
+          % (server.url, args.miss_rate * 100, args.latency * 1000, args.jitter * 1000, args.kilobytes))
+    print("download: NICENESS=%s, CONCURRENCY=%d; parse: %s backend, %d jobs\n"
+          % (args.niceness, args.concurrency, args.backend, args.jobs))
+    print("%7s %-8s %8s %10s %9s %9s %9s %9s %9s" % ("titles", "stage", "seconds", "items/s", "requests",
+                                                   "p50 ms", "p90 ms", "p99 ms", "RSS MB"))
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix="epic-ratings-benchmark-")
+        try:
+            fakemetacritic.fakePurchaseHistory(os.path.join(workdir, "history.txt"), size)
+            with server.lock:
+                del server.requests[:]
+            seconds, rss = runStage("download", workdir, options)
+            latencies = sorted(latency for latency, _ in server.requests)
+            print("%7d %-8s %8.2f %10.1f %9d %9.1f %9.1f %9.1f %9.1f" %
+                  (size, "download", seconds, size / seconds, len(latencies),
+                   percentile(latencies, 50) * 1000, percentile(latencies, 90) * 1000,
+                   percentile(latencies, 99) * 1000, rss))
+            store = openPageStore(os.path.join(workdir, pageStore))
+            pages = len(store.keys(platformsOrdered))
+            store.close()
+            seconds, rss = runStage("parse", workdir, options)
+            print("%7d %-8s %8.2f %10.1f %9s %9s %9s %9s %9.1f" % (size, "parse", seconds, pages / seconds,
+                                                                   "", "", "", "", rss))
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir)
+        if args.pipeline: # both at once, from scratch
+            workdir = tempfile.mkdtemp(prefix="epic-ratings-benchmark-")
+            try:
+                fakemetacritic.fakePurchaseHistory(os.path.join(workdir, "history.txt"), size)
+                seconds, rss = runStage("pipeline", workdir, options)
+                print("%7d %-8s %8.2f %10.1f %9s %9s %9s %9s %9.1f" % (size, "pipeline", seconds, size / seconds,
+                                                                       "", "", "", "", rss))
+            finally:
+                if not args.keep:
+                    shutil.rmtree(workdir)
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="offline benchmarks for epic-ratings")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("parsers", help="parser backends: parity and pages per second")
+    p.add_argument("--folder", default=pageStore, help="saved pages to include (folder or page store)")
+    p.add_argument("--synthetic", type=int, default=200, help="number of synthetic pages")
+    p.set_defaults(run=benchmarkParsers)
+
+    p = sub.add_parser("fields", help="fieldspec.py vs. the hand-written parse* functions: parity, speed, broken pages")
+    p.add_argument("--folder", default=pageStore, help="saved pages to include (folder or page store)")
+    p.add_argument("--synthetic", type=int, default=200, help="number of synthetic pages")
+    p.set_defaults(run=benchmarkFields)
+
+    p = sub.add_parser("titles", help="simplifyTitle: golden check against the plain loops, and speed")
+    p.add_argument("--history", default=epicHistoryFile, help="purchase history for the golden check")
+    p.add_argument("--titles", type=int, default=20000, help="number of synthetic titles")
+    p.add_argument("--rules", type=int, default=100, help="made-up rules added for the speed test")
+    p.set_defaults(run=benchmarkTitles)
+
+    p = sub.add_parser("analytics", help="analytics.py: same numbers as plain loops, and milliseconds")
+    p.add_argument("--titles", type=int, default=10000, help="number of synthetic results")
+    p.set_defaults(run=benchmarkAnalytics)
+
+    p = sub.add_parser("slugs", help="fuzzy slug resolver: requests per resolved title, with and without")
+    p.add_argument("--titles", type=int, default=1000, help="number of titles in the purchase history")
+    p.add_argument("--variants", type=float, default=0.3, help="share of editions/demos/... of a game")
+    p.add_argument("--sequels", type=float, default=0.1, help="share of sequels/remasters of a game")
+    p.add_argument("--threshold", type=float, default=0.6, help="FUZZY_THRESHOLD to compare with")
+    p.add_argument("--miss-rate", type=float, default=0.3, help="chance that a game is not on a platform")
+    p.add_argument("--concurrency", type=int, default=8, help="CONCURRENCY for the downloader")
+    p.set_defaults(run=benchmarkSlugs)
+
+    p = sub.add_parser("rates", help="adaptive rate vs. fixed NICENESS against a server that throttles")
+    p.add_argument("--titles", type=int, default=100, help="number of titles in the purchase history")
+    p.add_argument("--max-rate", type=float, default=3.0, help="requests per second the server allows")
+    p.add_argument("--retry-after", type=int, default=1, help="seconds in its Retry-After header")
+    p.add_argument("--latency", type=float, default=0.03, help="seconds per answer")
+    p.add_argument("--miss-rate", type=float, default=0.3, help="chance that a game is not on a platform")
+    p.add_argument("--niceness", type=float, default=1.0, help="NICENESS: the fixed rate, and where AIMD starts")
+    p.add_argument("--concurrency", type=int, default=4, help="CONCURRENCY for the downloader")
+    p.set_defaults(run=benchmarkRates)
+
+    p = sub.add_parser("refresh", help="refresh.py against a full crawl: requests, bytes, correct ratings")
+    p.add_argument("--titles", type=int, default=500, help="number of titles in the purchase history")
+    p.add_argument("--max-age", type=float, default=730, help="pages are up to that many days old")
+    p.add_argument("--change-rate", type=float, default=0.05, help="share of pages with new ratings")
+    p.add_argument("--cosmetic-rate", type=float, default=0.05, help="share of pages with other changes")
+    p.add_argument("--miss-rate", type=float, default=0.3, help="chance that a game is not on a platform")
+    p.add_argument("--kilobytes", type=int, default=100, help="size of each page")
+    p.add_argument("--concurrency", type=int, default=8, help="CONCURRENCY for the downloads")
+    p.set_defaults(run=benchmarkRefresh)
+
+    p = sub.add_parser("startup", help="epicratings.py: milliseconds until each subcommand can start")
+    p.add_argument("--runs", type=int, default=9, help="fresh interpreters per subcommand")
+    p.add_argument("--backend", default=PARSER_BACKEND, help="PARSER_BACKEND, i.e. the parser modules loaded")
+    p.set_defaults(run=benchmarkStartup)
+
+    p = sub.add_parser("e2e", help="downloader.main and filesparser.main against a local fake metacritic")
+    p.add_argument("--sizes", type=lambda text: [int(n) for n in text.split(",")], default=[100, 1000, 10000],
+                   help="comma separated numbers of titles in the generated purchase histories")
+    p.add_argument("--miss-rate", type=float, default=0.3, help="chance of a 404 per platform")
+    p.add_argument("--latency", type=float, default=0.02, help="seconds per answer")
+    p.add_argument("--jitter", type=float, default=0.01, help="plus up to that many seconds")
+    p.add_argument("--kilobytes", type=int, default=100, help="size of each page")
+    p.add_argument("--niceness", type=float, default=0.0, help="NICENESS for the downloader")
+    p.add_argument("--concurrency", type=int, default=CONCURRENCY, help="CONCURRENCY for the downloader")
+    p.add_argument("--jobs", type=int, default=1, help="processes for the parser")
+    p.add_argument("--backend", default=PARSER_BACKEND, help="PARSER_BACKEND for the parser")
+    p.add_argument("--pipeline", action="store_true", help="also time pipeline.py, download and parse at once")
+    p.add_argument("--keep", action="store_true", help="don't delete the temporary folders")
+    p.set_defaults(run=benchmarkEndToEnd)
+
+    args = parser.parse_args()
+    ok = args.run(args)
+    raise SystemExit(0 if ok in (None, True) else 1)
+
+
+if __name__ == "__main__":
+    main()
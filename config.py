@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+######################################################
+#  config.py
+#
+#   since 18/10/2026
+#
+#  settings.py, read once into one read-only object:
+#   lists become tuples, dicts read-only mappings.
+#  For epicratings.py (its options and their defaults);
+#   the other modules still read settings.py themselves,
+#    with 'from settings import'. The title rules too:
+#     those may be edited at runtime (downloader.py).
+#  What is compiled from the settings is compiled once,
+#   on first use: the results columns.
+#
+#    from config import loadConfig
+#    config = loadConfig()
+#    config.CONCURRENCY, config.columns
+######################################################
+
+import types
+import functools
+import importlib
+
+
+def freeze(value):
+    """lists and tuples become tuples, dicts read-only mappings, sets frozensets; all the way down"""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+class Config(object):
+    """all names of a settings module, frozen; plus what is compiled from them"""
+
+    def __init__(self, settings):
+        values = {name: freeze(value) for name, value in vars(settings).items()
+                  if not name.startswith("_") and not isinstance(value, types.ModuleType)}
+        object.__setattr__(self, "values", types.MappingProxyType(values))
+        object.__setattr__(self, "source", getattr(settings, "__file__", settings.__name__))
+
+    def __getattr__(self, name):
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError("%r is not in %s" % (name, self.source)) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("the config is read only; change %r in %s instead" % (name, self.source))
+
+    def __delattr__(self, name):
+        raise AttributeError("the config is read only; change %r in %s instead" % (name, self.source))
+
+    @functools.cached_property
+    def columns(self):
+        """COLUMN_ORDER, without the empty columns unless EMPTY_COLUMNS"""
+        return tuple(column for column in self.COLUMN_ORDER if column or self.EMPTY_COLUMNS)
+
+
+@functools.lru_cache(maxsize=None)
+def loadConfig(module="settings"):
+    """the Config of that settings module; read once per process"""
+    return Config(importlib.import_module(module))
@@ -15,62 +15,84 @@ import sys
 import os
 import time
 import csv
-from pprint import pprint
-import requests # pip3 install requests
+import collections
+import concurrent.futures
+from ratelimiter import HostRateLimiter, AdaptiveRateLimiter
+from httpcache import HttpCache, CachedResponse
+from platformindex import PlatformIndex
+from pagestore import openPageStore
+from metrics import openMetrics, NO_METRICS
+from jobqueue import JobQueue
+from slugresolver import buildSlugResolver
+from titlerules import TitleRules, trieRegex
 from settings import * # do read that file, to adapt to your needs
 
 
-def readEpicgamesPurchaseHistoryFile(epicHistoryFile,
+def iterEpicgamesPurchaseHistoryFile(epicHistoryFile,
                                         contentStart=contentStart,
                                         contentEnd=contentEnd):
     """
-    read plaintext file, and extract the games table
+    read plaintext file line by line, and yield only the lines of the games table,
+    so neither the whole file nor the whole table is ever in memory
     """
     with open(epicHistoryFile) as f:
-        lines=f.readlines()
-    # print(lines)
-    start = lines.index(contentStart)
-    end = lines.index(contentEnd) 
-    print ("Done loading input file; relevant table is between lines %d and %d." % (start, end))
-    myCsv=lines[start+1:end]
-    return myCsv
+        start = None
+        for number, line in enumerate(f):
+            if start is not None:
+                if line == contentEnd:
+                    print ("Done loading input file; relevant table is between lines %d and %d." % (start, number))
+                    return
+                yield line
+            elif line == contentStart:
+                start = number
+    if start is None:
+        raise ValueError("%r not found in '%s'" % (contentStart, epicHistoryFile))
+    raise ValueError("%r not found after the table in '%s'" % (contentEnd, epicHistoryFile))
 
 
-def simplifyTitle(name, removeChars=REMOVE_CHARS, 
-                        replacers = REPLACERS,
-                        removeSentences=REMOVE_SENTENCES,
-                        namesMapper=NAMES_MAPPER,
-                        namesIgnorer=NAMES_IGNORER):
+def readEpicgamesPurchaseHistoryFile(epicHistoryFile,
+                                        contentStart=contentStart,
+                                        contentEnd=contentEnd):
+    """
+    read plaintext file, and extract the games table
+    """
+    return list(iterEpicgamesPurchaseHistoryFile(epicHistoryFile, contentStart, contentEnd))
 
-    """see comments in settings.py for how to adapt this"""
 
-    # non automated = some games are just not there, on metacritic:
-    if name in namesIgnorer:
-        return False
+# the compiled title rules of the lists simplifyTitle saw last;
+# compiled again as soon as their content differs (see currentTitleRules)
+TITLE_RULES = None
 
-    # non automated = manually assign urlpaths to game names:   
-    if name in namesMapper:
-        return namesMapper[name]    
 
-    # semi automated = by dropping parts of the game names:
-    for sentence in removeSentences:
-        name = name.replace(sentence,"")
+def currentTitleRules(removeChars=None, replacers=None, removeSentences=None, namesMapper=None, namesIgnorer=None):
+    """
+    the compiled TitleRules of those lists, by default the ones of settings.py as they are now:
+    edits at runtime (e.g. NAMES_MAPPER["Foo Bar"] = "foo" in tweaker.ipynb) count from the next call on
+    """
+    global TITLE_RULES
+    lists = (REMOVE_CHARS if removeChars is None else removeChars,
+             REPLACERS if replacers is None else replacers,
+             REMOVE_SENTENCES if removeSentences is None else removeSentences,
+             NAMES_MAPPER if namesMapper is None else namesMapper,
+             NAMES_IGNORER if namesIgnorer is None else namesIgnorer)
+    if TITLE_RULES is None or not TITLE_RULES.compiledFrom(*lists):
+        TITLE_RULES = TitleRules(*lists)
+    return TITLE_RULES
 
-    # automated = rules based characters replacement, etc
-    for rem in removeChars:
-        name = name.replace(rem,"")
 
-    name=name.lower()
-    name=name.strip()
+def simplifyTitle(name, removeChars=None, 
+                        replacers = None,
+                        removeSentences=None,
+                        namesMapper=None,
+                        namesIgnorer=None):
 
-    for find, replace in replacers:
-        name = name.replace(find,replace)
+    """see comments in settings.py for how to adapt this; None = the list of settings.py"""
 
-    return name
+    return currentTitleRules(removeChars, replacers, removeSentences, namesMapper, namesIgnorer).simplify(name)
 
 
-def createDownloadList(myCsv, debugging=False):
-    """urlpath becomes the fifth column in the csv"""
+def iterDownloadList(myCsv, debugging=False):
+    """urlpath becomes the fifth column in the csv; one game at a time"""
 
     # print(myCsv)
     reader = csv.reader(myCsv, delimiter="\t")
@@ -80,17 +102,23 @@ def createDownloadList(myCsv, debugging=False):
         print(title) 
         print()
 
-    toDownload=[]
+    titleRules = currentTitleRules() # once for the whole list
+    count = 0
     for t in reader:
         if len(t)<2: # omit e.g. empty lines
             continue
-        t[4]=simplifyTitle(t[1])
+        t[4]=titleRules.simplify(t[1])
         if debugging:
             print(t)
-        toDownload.append(t)
+        count += 1
+        yield t
     
-    print ("Done creating URLPATHs for most of those %d games." % len(toDownload))
-    return toDownload
+    print ("Done creating URLPATHs for most of those %d games." % count)
+
+
+def createDownloadList(myCsv, debugging=False):
+    """urlpath becomes the fifth column in the csv"""
+    return list(iterDownloadList(myCsv, debugging))
 
 
 def makeFolderUnlessExists(foldername):
@@ -98,10 +126,159 @@ def makeFolderUnlessExists(foldername):
         os.mkdir(foldername)
 
 
-def DownloadPages(toDownload, printInfos=True, nice=NICENESS):
+def makeSession(poolsize=1):
+    """one pooled session for all requests, so connections are kept alive"""
+    import requests # pip3 install requests; imported here, as it takes longer than all the rest
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, poolsize))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def connectionsOpened(session):
+    """how many TCP connections the session's pools opened, i.e. were not kept alive"""
+    pools = session.get_adapter("https://").poolmanager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+
+def makeRateLimiter(nice=NICENESS):
+    """the AdaptiveRateLimiter of settings.py, or a fixed 1/nice per host; nice=0 is unlimited either way"""
+    rate = 1.0/nice if nice > 0 else 0
+    if ADAPTIVE_RATE and rate > 0:
+        return AdaptiveRateLimiter(rate, RATE_FLOOR, RATE_CEILING, RATE_INCREASE, RATE_DECREASE,
+                                   RATE_LATENCY_FACTOR, RETRY_AFTER_MAX, burst=RATE_BURST)
+    return HostRateLimiter(rate, burst=RATE_BURST)
+
+
+def rateFeedback(limiter, url, status, sent, seconds, retryAfter, metrics):
+    """tell the limiter how the request went; count the changes of its rate"""
+    changed = limiter.feedback(url, status, sent, seconds, retryAfter)
+    if changed:
+        reason, rate = changed
+        if reason == "healthy":
+            metrics.count("rate: increased")
+        else:
+            metrics.count("rate: decreased (%s)" % reason)
+            metrics.event("rate", url=url, reason=reason, rate=round(rate, 3))
+
+
+def fetchPage(url, session, cache=None, limiter=None, earlierPage=None, metrics=NO_METRICS):
+    """
+    GET that url, but a 404 known to the cache is answered without asking again.
+    With 'earlierPage' = an earlier copy of the page, ask conditionally;
+    the answer '304 Not Modified' then comes back as that copy, with status 200.
+    How it went (status, time to first byte, Retry-After) goes back to the limiter.
+    """
+    if cache:
+        status = cache.knownMiss(url)
+        if status:
+            metrics.count("http cache: known %s" % status)
+            return CachedResponse(status)
+    conditional = {}
+    if cache and earlierPage is not None:
+        conditional = cache.conditionalHeaders(url)
+    if limiter:
+        with metrics.time("download: wait for rate limiter"):
+            limiter.acquire(url)
+    started = time.perf_counter()
+    try:
+        page = session.get(url=url, headers=conditional, timeout=TIMEOUT)
+    except Exception:
+        if limiter:
+            rateFeedback(limiter, url, None, started, time.perf_counter() - started, None, metrics)
+        raise
+    # requests can't tell DNS and connect apart from the server's wait: all until the headers
+    seconds, firstByte = time.perf_counter() - started, page.elapsed.total_seconds()
+    if limiter:
+        rateFeedback(limiter, url, page.status_code, started, firstByte, page.headers.get("Retry-After"), metrics)
+    if metrics is not NO_METRICS:
+        metrics.add("download: connect + first byte", firstByte, url)
+        metrics.add("download: transfer", max(0.0, seconds - firstByte), url)
+        metrics.count("status %s" % page.status_code)
+        metrics.count("bytes downloaded", len(page.content))
+        metrics.event("request", url=url, status=page.status_code, ms=round(seconds * 1e3, 3),
+                      firstByteMs=round(firstByte * 1e3, 3), bytes=len(page.content))
+    if cache:
+        cache.store(url, page)
+    if page.status_code == 304:
+        page = CachedResponse(200, earlierPage, page.headers, fromCache=False)
+    return page
+
+
+def retryDelay(status):
+    """seconds until the job queue first retries a title that failed with that status; inf = never"""
+    maxAttempts, backoff = RETRY_POLICY.get(status, DEFAULT_RETRY)
+    return backoff if maxAttempts > 1 else float("inf")
+
+
+def retryStatus(page):
+    """the status the job queue and the index go by: page.status_code, or the retryStatus downloadGame set"""
+    return None if page is None else getattr(page, "retryStatus", page.status_code)
+
+
+def downloadGame(game, say, session, cache=None, limiter=None, nice=NICENESS, metrics=NO_METRICS,
+                 platforms=platformsOrdered):
+    """
+    try all platforms for one game, in that order, until one succeeds.
+    returns (platform, page, secondsInRequests), not counting the waits for
+    the limiter; page is the last response (or None), so a non-200 status
+    tells the caller that all failed; then page.retryStatus is the most
+    retryable status of all platforms, e.g. a 503 on one of them and 404s on
+    the others is a 503, and a timeout None (see retryStatus()).
+    With a 'limiter' the NICENESS sleep is replaced by its token bucket.
+    """
+    page, platform, seconds = None, None, 0.0
+    failed = [] # status of each failed platform, None = no answer
+    for platform in platforms:
+        say (platform, end="")
+        url = metacriticUrl + "/" + platform + "/" + game[4]
+        # say (url)
+
+        t0, waited = time.monotonic(), limiter.waited() if limiter else 0.0
+        try:
+            page = fetchPage(url, session, cache, limiter, metrics=metrics)
+            # throttled: not an answer about this platform; the limiter has slowed down, ask again
+            for retry in range(THROTTLED_RETRIES if isinstance(limiter, AdaptiveRateLimiter) else 0):
+                if page.status_code not in AdaptiveRateLimiter.THROTTLING:
+                    break
+                metrics.count("download: throttled, asked again")
+                page = fetchPage(url, session, cache, limiter, metrics=metrics)
+        except Exception:
+            failed.append(None)
+            metrics.count("download: exceptions")
+            say ("=failed, trying next:", end=" ")
+        else:
+            if not getattr(page, "fromCache", False):
+                metrics.count("requests %s" % platform)
+            if page.status_code==200:
+                say ("=succeeded, break.", end = " ")
+                if not limiter and not getattr(page, "fromCache", False):
+                    print("..", end=""); sys.stdout.flush()
+                    with metrics.time("download: niceness sleep"):
+                        time.sleep(nice)
+                    print(".", end=" ")
+                break
+            else:
+                failed.append(page.status_code)
+                say("=failed with %s, trying next:" % page.status_code, end=" ")
+        finally: # only the requests: a serial run would not have waited for the limiter
+            seconds += time.monotonic() - t0 - (limiter.waited() - waited if limiter else 0.0)
+    if failed and page is not None and page.status_code != 200:
+        page.retryStatus = min(failed, key=retryDelay)
+    return platform, page, seconds
+
+
+def openJobQueue():
+    return JobQueue(jobQueueFile, RETRY_POLICY, DEFAULT_RETRY) if jobQueueFile else None
+
+
+def DownloadPages(toDownload, printInfos=True, nice=NICENESS, concurrency=CONCURRENCY, onPage=None, store=None,
+                  metrics=None, jobs=None):
     """
         get all the pages:
-        * make subfolder
+        * open the page store (e.g. make subfolder)
         * skip over the excluded titles (not on metacritic yet)
         * check if downloaded already: first /pc/ then /playstation-4/ then /switch/
         * if not, then download page: pc, ps4, switch
@@ -110,81 +287,299 @@ def DownloadPages(toDownload, printInfos=True, nice=NICENESS):
         after loop finishes:
         * show number of failedDownloads
         * return failedDownloads list
+        with concurrency>0, several games are downloaded at once by a thread
+        pool (rate limited per host), but results are still handled in order,
+        so the output and the failedDownloads list are the same as serially.
+        onPage(platform, urlpath, text) is called for each saved page, and with
+        text=None for each page that was in the store already (see pipeline.py).
+        Timers and counters go into 'metrics' (default: a new one, see metrics.py).
+        The state of each title goes into the JobQueue 'jobs' (default: the
+        jobQueueFile), which also decides when failed titles are tried again.
     """
-    makeFolderUnlessExists(downloadsFolder)
+    ownStore = store is None
+    store = openPageStore(pageStore) if ownStore else store
+    ownMetrics = metrics is None
+    metrics = openMetrics() if ownMetrics else metrics
+    ownJobs = jobs is None
+    jobs = openJobQueue() if ownJobs else jobs
     failedDownloads=[]
+    session = makeSession(poolsize=concurrency)
+    cache = HttpCache(httpCacheFile, NEGATIVE_TTL) if httpCacheFile else None
+    index = PlatformIndex(platformIndexFile, store, platformsOrdered) if platformIndexFile else None
+    resolver = None
+    if FUZZY_THRESHOLD is not None:
+        resolver = buildSlugResolver(FUZZY_THRESHOLD, FUZZY_NOISE_WORDS, FUZZY_DISTINGUISHING_WORDS, store,
+                                     platformsOrdered, NAMES_MAPPER, index, slugListFile)
+    # serially without ADAPTIVE_RATE, the plain NICENESS sleep
+    limiter = makeRateLimiter(nice) if concurrency > 0 or ADAPTIVE_RATE else None
+    started = time.monotonic()
+    serialEstimate = 0.0
 
     # printer defined locally, changes behaviour via 'printInfos' variable
     def printInfo(text, end="\n", printInfos=printInfos):
         if printInfos:
             print(text, end=end)
 
-    for i, game in enumerate(toDownload):
-        printInfo ("%3d %10s %s" % (i, game[0], game[4]), end=" ")
-        if game[4]==False:
-            printInfo("IGNORE THIS TITLE '%s', IS PROBABLY NOT ON METACRITIC."%game[1])
-            continue
-
-        page = None
-        for platform in platformsOrdered:
-            filename=os.path.join(downloadsFolder, platform + "_" + game[4] + ".html")
-            if os.path.exists(filename):
-                printInfo ("ALREADY DOWNLOADED '%s' = skip." % platform)
-                page = True
-                break
-
-        if page == True:
-            continue
-
+    def alreadyDownloaded(urlpath):
+        """the platform whose page of urlpath is in the store, or None"""
+        if index and urlpath in index.entries: # known, so no need to look at every platform
+            platform = index.resolved(urlpath)
+            if platform is None:
+                return None
+            if store.exists(platform, urlpath):
+                return platform
+            index.forget(urlpath) # page was deleted meanwhile
         for platform in platformsOrdered:
-            printInfo (platform, end="")
-            url = metacriticUrl + "/" + platform + "/" + game[4]
-            # printInfo (url)
-
-            try:
-                page = requests.get(url=url, headers=headers, timeout=TIMEOUT)
-            except:
-                printInfo ("=failed, trying next:", end=" ")
+            if store.exists(platform, urlpath):
+                return platform
+        return None
+
+    def waitingForRetry(game):
+        """(progress text, download result) if the title failed, and is not due for a retry yet; else None"""
+        job = jobs.job(game) if jobs else None
+        if job and job[0] == "failed": # the job queue's retry policy decides, not the index
+            status, attempts, nextTry = job[1:]
+            if nextTry <= time.time():
+                return None
+            metrics.count("pages: waiting for retry (jobs)")
+            when = "GAVE UP" if nextTry == float("inf") else time.strftime("RETRY AFTER %Y-%m-%d %H:%M", time.localtime(nextTry))
+            return (["FAILED %d TIMES WITH %s, %s = skip: " % (attempts, status, when)],
+                    (None, CachedResponse(status) if status else None, 0.0, None))
+        return None
+
+    def download(game, say):
+        """
+        downloadGame for the guessed urlpath, unless the index knows it fails on all platforms;
+        if it does, then for the most similar known slug (see slugresolver.py), if any.
+        returns (platform, page, seconds, fuzzy); fuzzy = (slug, similarity, page of the guess)
+        if that slug was asked for (or its page is stored already: then a CachedResponse 200), else None
+        """
+        status = index.knownFailure(game[4], NEGATIVE_TTL) if index else None
+        if status is not None:
+            metrics.count("pages: known to fail (index)")
+            say ("KNOWN TO FAIL WITH %s: " % status, end="")
+            platform, page, seconds = None, CachedResponse(status), 0.0
+        else:
+            platform, page, seconds = downloadGame(game, say=say, session=session, cache=cache, limiter=limiter,
+                                                   nice=nice, metrics=metrics, platforms=platformOrder(game[4]))
+        if not resolver or (page is not None and page.status_code==200):
+            return platform, page, seconds, None
+        slug, similarity = resolver.resolve(game[4])
+        if slug == game[4]:
+            return platform, page, seconds, None
+        say ("SIMILAR '%s' (%.2f): " % (slug, similarity), end="")
+        platform = alreadyDownloaded(slug) # e.g. found like this in an earlier run
+        if platform:
+            return platform, CachedResponse(200), seconds, (slug, similarity, page)
+        similar = game[:4] + [slug] + game[5:]
+        fuzzyPlatform, fuzzyPage, fuzzySeconds = downloadGame(similar, say=say, session=session, cache=cache,
+                                                              limiter=limiter, nice=nice, metrics=metrics,
+                                                              platforms=platformOrder(slug))
+        return fuzzyPlatform, fuzzyPage, seconds + fuzzySeconds, (slug, similarity, page)
+
+    def remember(urlpath, platform, page):
+        """what metacritic answered for urlpath, into the index"""
+        if index and page is not None and not getattr(page, "fromCache", False):
+            index.record(urlpath, platform if page.status_code==200 else None, retryStatus(page))
+
+    def handleResult(game, platform, page, attempted=True, fuzzy=None):
+        if fuzzy: # the guess failed on all platforms, so a similar known slug was asked for
+            slug, similarity, guessPage = fuzzy
+            found = page is not None and page.status_code==200
+            metrics.count("slugs: similar slug %s" % ("found" if found else "failed too"))
+            metrics.event("fuzzy", title=game[1], guess=game[4], slug=slug, similarity=round(similarity, 3),
+                          found=found)
+            if found:
+                remember(game[4], None, guessPage)
+                game[4] = slug
+            else: # the title failed as guessed
+                remember(slug, None, page)
+                platform, page = None, guessPage
+        remember(game[4], platform, page)
+        if jobs and attempted:
+            if page is None or page.status_code!=200:
+                jobs.fail(game, retryStatus(page))
             else:
-                if page.status_code==200:
-                    printInfo ("=succeeded, break.", end = " ")
-                    print("..", end=""); sys.stdout.flush()
-                    time.sleep(NICENESS)
-                    print(".", end=" ")
-                    break
-                else:
-                    printInfo("=failed with %s, trying next:" % page.status_code, end=" ")
-
-
-
-        # printInfo(page)
+                jobs.done(game, platform)
         if page == None:
             failedDownloads.append(game)
+            metrics.count("pages: failed")
             printInfo ("all=FAILED.")
         elif page.status_code!=200:
             failedDownloads.append(game + [page.status_code])
+            metrics.count("pages: failed")
             printInfo ("all=FAILED.")
+        elif getattr(page, "fromCache", False): # a similar slug, stored already
+            metrics.count("pages: already downloaded")
+            printInfo ("ALREADY DOWNLOADED '%s' = skip." % platform)
+            if onPage:
+                onPage(platform, game[4], None)
         else:
-            filename=os.path.join(downloadsFolder, platform + "_" + game[4] + ".html")
-            with open(filename, "w") as f:
-                f.write(page.text)
+            with metrics.time("store: write page", game[4]):
+                store.put(platform, game[4], page.text)
+            metrics.count("pages: saved")
+            if resolver:
+                resolver.add(game[4], platform)
             printInfo ("SUCCEEDED, PAGE SAVED.")
+            if onPage:
+                onPage(platform, game[4], page.text)
 
+    def skipReason(game):
+        """(message, platform of the page on disk) if nothing needs to be downloaded, else None"""
+        if jobs:
+            jobs.add(game)
+        if game[4]==False:
+            if jobs:
+                jobs.ignore(game)
+            metrics.count("pages: ignored title")
+            return "IGNORE THIS TITLE '%s', IS PROBABLY NOT ON METACRITIC."%game[1], None
+        platform = alreadyDownloaded(game[4])
+        if platform:
+            if jobs:
+                jobs.done(game, platform)
+            metrics.count("pages: already downloaded")
+            return "ALREADY DOWNLOADED '%s' = skip." % platform, platform
+        return None
+
+    def platformOrder(urlpath):
+        return resolver.platformOrder(urlpath, platformsOrdered) if resolver else platformsOrdered
+
+    def handleSkip(game, skip):
+        message, platform = skip
+        printInfo (message)
+        if onPage and platform:
+            onPage(platform, game[4], None)
+
+    def serialLoop():
+        nonlocal serialEstimate
+        for i, game in enumerate(toDownload):
+            printInfo ("%3d %10s %s" % (i, game[0], game[4]), end=" ")
+            skip = skipReason(game)
+            if skip:
+                handleSkip(game, skip)
+                continue
+            waiting = waitingForRetry(game)
+            if waiting:
+                said, (platform, page, seconds, fuzzy) = waiting
+                printInfo ("".join(said), end="")
+            else:
+                if jobs:
+                    jobs.start(game)
+                platform, page, seconds, fuzzy = download(game, printInfo)
+            serialEstimate += seconds + (nice if page is not None and page.status_code==200
+                                                  and not getattr(page, "fromCache", False) else 0)
+            # printInfo(page)
+            handleResult(game, platform, page, attempted=not waiting, fuzzy=fuzzy)
+
+    def concurrentLoop():
+        def work(game):
+            # the progress text is collected, and printed when it is this game's turn
+            said = []
+            say = lambda text, end="\n": said.append(text + end)
+            return said, download(game, say)
+
+        # window of games in order; its futures are the requests in flight
+        window = collections.deque()
+
+        def finishOldest():
+            nonlocal serialEstimate
+            i, game, skip, attempted, future = window.popleft()
+            printInfo ("%3d %10s %s" % (i, game[0], game[4]), end=" ")
+            if skip:
+                handleSkip(game, skip)
+                return
+            said, (platform, page, seconds, fuzzy) = future.result()
+            printInfo("".join(said), end="")
+            serialEstimate += seconds + (nice if page is not None and page.status_code==200
+                                                  and not getattr(page, "fromCache", False) else 0)
+            handleResult(game, platform, page, attempted, fuzzy)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for i, game in enumerate(toDownload):
+                skip = skipReason(game)
+                waiting = None if skip else waitingForRetry(game)
+                if skip:
+                    future = None
+                elif waiting:
+                    future = concurrent.futures.Future()
+                    future.set_result(waiting)
+                else:
+                    if jobs:
+                        jobs.start(game)
+                    future = pool.submit(work, game)
+                window.append((i, game, skip, not skip and not waiting, future))
+                while len(window) > 2 * concurrency:
+                    finishOldest()
+            while window:
+                finishOldest()
+
+    try:
+        serialLoop() if concurrency <= 0 else concurrentLoop()
+    finally: # also keep what was learned when interrupted
+        if cache:
+            cache.save()
+        if index:
+            index.save()
+        metrics.count("connections opened", connectionsOpened(session))
+        session.close()
+        if ownStore:
+            store.close()
+        if jobs:
+            counts = jobs.counts()
+            if ownJobs:
+                jobs.close()
+
+    wallclock = time.monotonic() - started
     print ("\nREADY. %d failed downloads." % len(failedDownloads))
+    if jobs:
+        print ("Job queue: " + ", ".join("%d %s" % (n, state) for state, n in counts.items()) + ".")
+    if concurrency > 0 and wallclock > 0 and serialEstimate > 0:
+        print ("Took %.1f seconds with %d threads; serially, roughly %.1f seconds = speedup %.1fx."
+               % (wallclock, concurrency, serialEstimate, serialEstimate / wallclock))
+    else:
+        print ("Took %.1f seconds." % wallclock)
+    if isinstance(limiter, AdaptiveRateLimiter):
+        print ("Rate now: " + ", ".join("%.2f requests/s for %s" % (rate, host)
+                                        for host, rate in limiter.rates().items()) + ".")
+    if ownMetrics:
+        metrics.summary("download")
+        metrics.close()
     # pprint(failedDownloads)
     return failedDownloads
 
 
 def failedDownloadsPrettyPrint(failedDownloads):
-    pprint(["%s = %s = %s" % (t[5], t[4], t[1]) for t in failedDownloads])
+    from pprint import pprint
+    pprint(["%s = %s = %s" % (t[5] if len(t) > 5 else "no answer", t[4], t[1]) for t in failedDownloads])
 
 
-def main(epicHistoryFile, printInfos):
-    myCsv = readEpicgamesPurchaseHistoryFile(epicHistoryFile)
-    toDownload = createDownloadList(myCsv)
-    failedDownloads = DownloadPages(toDownload, printInfos=printInfos) # printInfos=False)
+def main(epicHistoryFile, printInfos, retryFailures=False, **downloadOptions):
+    """
+    downloadOptions e.g. nice=.., concurrency=.. are passed on to DownloadPages;
+    retryFailures: only the failed titles of the job queue that are due again
+    """
+    if retryFailures:
+        jobs = openJobQueue()
+        if not jobs:
+            raise ValueError("--retry-failures needs a jobQueueFile in settings.py")
+        toDownload = jobs.due()
+        print ("Retrying %d failed titles from '%s'." % (len(toDownload), jobQueueFile))
+        try:
+            failedDownloads = DownloadPages(toDownload, printInfos=printInfos, jobs=jobs, **downloadOptions)
+        finally:
+            jobs.close()
+    else:
+        # all lazy: downloads begin while the file is still being read
+        myCsv = iterEpicgamesPurchaseHistoryFile(epicHistoryFile)
+        toDownload = iterDownloadList(myCsv)
+        failedDownloads = DownloadPages(toDownload, printInfos=printInfos, **downloadOptions) # printInfos=False)
     failedDownloadsPrettyPrint(failedDownloads)
 
 
 if __name__ == '__main__':
-    main(epicHistoryFile=epicHistoryFile, printInfos=True)
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="download the metacritic page of each game")
+    parser.add_argument("--retry-failures", action="store_true",
+                        help="only retry the failed titles that are due (see RETRY_POLICY in settings.py)")
+    args = parser.parse_args()
+    main(epicHistoryFile=epicHistoryFile, printInfos=True, retryFailures=args.retry_failures)
\ No newline at end of file
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+######################################################
+#  epicratings.py
+#
+#   since 18/10/2026
+#
+#  one command line for all of it, quick to start:
+#   each subcommand imports only what it needs, so
+#    'stats' or 'export' never wait for requests, bs4
+#     or numpy, e.g. when run from cron:
+#
+#    python3 epicratings.py download [--retry-failures]
+#    python3 epicratings.py parse [--jobs 0] [--backend lxml]
+#    python3 epicratings.py pipeline [--jobs 0]
+#    python3 epicratings.py refresh [--dry-run]
+#    python3 epicratings.py export [--format sqlite] [results.csv]
+#    python3 epicratings.py stats [--failed]
+#    python3 epicratings.py analytics [results.csv]
+#
+#  settings.py is read once, into config.loadConfig().
+######################################################
+
+import os
+import sys
+import time
+import argparse
+import importlib
+from config import loadConfig
+
+# the modules a parser backend needs (see filesparser.parserBackend)
+PARSER_MODULES = {"html5lib": ["bs4", "html5lib"], "lxml": ["lxml.html"]}
+
+# subcommand: the modules it needs; None = those of the parser backend
+COMMANDS = {"download":  ["downloader", "requests"],
+            "parse":     ["filesparser", None],
+            "pipeline":  ["pipeline", "requests", None],
+            "refresh":   ["refresh", "requests", None],
+            "export":    ["resultstable"],
+            "stats":     ["jobqueue", "pagestore", "resultstable"],
+            "analytics": ["analytics", "numpy"]}
+
+
+def load(command, backend=None):
+    """
+    import the modules of that subcommand, and nothing else; all of them now,
+    so that a missing one stops the run before it begins, not halfway through
+    """
+    backend = backend or loadConfig().PARSER_BACKEND
+    names = []
+    for name in COMMANDS[command]:
+        names.extend(PARSER_MODULES[backend] if name is None else [name])
+    try:
+        return [importlib.import_module(name) for name in names]
+    except ModuleNotFoundError as e:
+        sys.exit("'%s' needs the module %s: pip3 install %s" % (command, e.name, e.name.split(".")[0]))
+
+
+def download(args, config):
+    downloader = load("download")[0]
+    downloader.main(args.historyFile, printInfos=True, retryFailures=args.retry_failures,
+                    nice=args.niceness, concurrency=args.concurrency)
+
+
+def parse(args, config):
+    filesparser = load("parse", args.backend)[0]
+    filesparser.main(config.pageStore, config.platformsOrdered, jobs=args.jobs or os.cpu_count(), backend=args.backend)
+
+
+def pipeline(args, config):
+    pipeline = load("pipeline", args.backend)[0]
+    pipeline.main(args.historyFile, jobs=args.jobs or os.cpu_count(), backend=args.backend,
+                  nice=args.niceness, concurrency=args.concurrency)
+
+
+def refresh(args, config):
+    refresh = load("refresh")[0]
+    refresh.refresh(nice=args.niceness, concurrency=args.concurrency, dryRun=args.dry_run)
+
+
+def export(args, config):
+    resultstable = load("export")[0]
+    unknown = [format for format in args.formats if format not in resultstable.EXPORTERS]
+    if unknown:
+        sys.exit("unknown format %s; known are: %s" % (", ".join(unknown), ", ".join(resultstable.EXPORTERS)))
+    resultsFile = args.resultsFile or resultstable.newestResults(config.downloadsFolder)
+    if not resultsFile:
+        sys.exit("no results yet; run 'python3 epicratings.py parse' first")
+    table = resultstable.ResultsTable.fromCsv(resultsFile)
+    print("%d games from '%s'" % (len(table), resultsFile))
+    for fn in resultstable.exportResults(table, resultsFile.replace(".csv", ""), args.formats):
+        print("saved to:", fn)
+
+
+def stats(args, config):
+    jobqueue, pagestore, resultstable = load("stats")
+    if config.jobQueueFile and os.path.exists(config.jobQueueFile):
+        jobs = jobqueue.JobQueue(config.jobQueueFile, config.RETRY_POLICY, config.DEFAULT_RETRY)
+        try:
+            counts, failures = jobs.counts(), jobs.failures()
+        finally:
+            jobs.close()
+        print("titles in '%s': %s" % (config.jobQueueFile, ", ".join("%d %s" % (counts[s], s) for s in jobqueue.STATES)))
+        if args.failed:
+            now = time.time()
+            for title, status, attempts, nextTry in failures:
+                retry = "never" if nextTry == float("inf") else "now" if nextTry <= now else "in %.1f h" % ((nextTry - now) / 3600)
+                print("  %-50s status %-4s attempts %d, retry %s" % (title[:50], status or "-", attempts, retry))
+    else:
+        print("no job queue yet (jobQueueFile in settings.py)")
+
+    if os.path.exists(config.pageStore):
+        store = pagestore.openPageStore(config.pageStore)
+        try:
+            keys = store.keys(config.platformsOrdered)
+        finally:
+            store.close()
+        perPlatform = [sum(1 for platform, _ in keys if platform == p) for p in config.platformsOrdered]
+        print("pages in '%s': %d (%s)" % (config.pageStore, len(keys),
+              ", ".join("%d %s" % (n, p) for n, p in zip(perPlatform, config.platformsOrdered))))
+    else:
+        print("no pages yet in '%s'" % config.pageStore)
+
+    resultsFile = resultstable.newestResults(config.downloadsFolder)
+    print("newest results: %s" % (resultsFile or "none yet"))
+
+
+def analytics(args, config):
+    analytics = load("analytics")[0]
+    resultsFile = args.resultsFile or analytics.newestResults(config.downloadsFolder)
+    if not resultsFile:
+        sys.exit("no results yet; run 'python3 epicratings.py parse' first")
+    analytics.main(resultsFile)
+
+
+def makeParser(config):
+    parser = argparse.ArgumentParser(description="metascores and userscores of your Epic Games library")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def downloadOptions(p):
+        p.add_argument("historyFile", nargs="?", default=config.epicHistoryFile,
+                       help="the purchase history (default: %(default)s)")
+        p.add_argument("--niceness", type=float, default=config.NICENESS,
+                       help="seconds between two requests (default: %(default)s)")
+        p.add_argument("--concurrency", type=int, default=config.CONCURRENCY,
+                       help="requests in flight (default: %(default)s)")
+
+    def parseOptions(p):
+        p.add_argument("--jobs", "-j", type=int, default=1,
+                       help="parse in that many processes (0 = one per CPU core)")
+        p.add_argument("--backend", choices=sorted(PARSER_MODULES), default=config.PARSER_BACKEND,
+                       help="parser backend (default: %(default)s)")
+
+    p = sub.add_parser("download", help="download the metacritic page of each game")
+    downloadOptions(p)
+    p.add_argument("--retry-failures", action="store_true",
+                   help="only retry the failed titles that are due (see RETRY_POLICY in settings.py)")
+    p.set_defaults(run=download)
+
+    p = sub.add_parser("parse", help="parse all downloaded pages into the results")
+    parseOptions(p)
+    p.set_defaults(run=parse)
+
+    p = sub.add_parser("pipeline", help="download and parse at the same time")
+    downloadOptions(p)
+    parseOptions(p)
+    p.set_defaults(run=pipeline)
+
+    p = sub.add_parser("refresh", help="download stale pages again, and log changed ratings")
+    p.add_argument("--niceness", type=float, default=config.NICENESS)
+    p.add_argument("--concurrency", type=int, default=config.CONCURRENCY)
+    p.add_argument("--dry-run", action="store_true", help="only count the stale pages")
+    p.set_defaults(run=refresh)
+
+    p = sub.add_parser("export", help="write the newest results csv in other formats")
+    p.add_argument("resultsFile", nargs="?", help="default: the newest in %s" % config.downloadsFolder)
+    p.add_argument("--format", dest="formats", action="append",
+                   help="csv, sqlite, parquet or feather; repeat for more (default: RESULTS_FORMATS, or sqlite)")
+    p.set_defaults(run=export)
+
+    p = sub.add_parser("stats", help="titles per job state, stored pages, newest results")
+    p.add_argument("--failed", action="store_true", help="list the failed titles, and when they are retried")
+    p.set_defaults(run=stats)
+
+    p = sub.add_parser("analytics", help="rankings and averages per genre group and developer (numpy)")
+    p.add_argument("resultsFile", nargs="?", help="default: the newest in %s" % config.downloadsFolder)
+    p.set_defaults(run=analytics)
+    return parser
+
+
+def main(argv=None):
+    config = loadConfig()
+    args = makeParser(config).parse_args(argv)
+    if args.command == "export" and not args.formats:
+        args.formats = [format for format in config.RESULTS_FORMATS if format != "csv"] or ["sqlite"]
+    args.run(args, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+######################################################
+#  fakemetacritic.py
+#
+#   since 18/10/2026
+#
+#  synthetic pages with the (old) metacritic markup
+#    that filesparser.py understands, so that parsers
+#     can be compared and benchmarked offline; and a
+#      local server that serves them, with 404s and
+#       latency, as a stand-in for metacritic.com
+######################################################
+
+import time
+import hashlib
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+GENRES = ["Action", "Adventure", "RPG", "Action RPG", "Shooter", "First-Person", "Strategy",
+          "Turn-Based", "Real-Time", "Simulation", "Puzzle", "Platformer", "Racing", "Sports",
+          "Open-World", "Survival", "Horror", "Roguelike", "Management", "Tactics"]
+COMPANIES = ["Epic Games", "FromSoftware", "Bandai Namco Games", "Paradox Interactive",
+             "Devolver Digital", "Annapurna Interactive", "Ubisoft", "Bethesda Softworks",
+             "2K Games", "Team17", "Klei Entertainment", "Obsidian Entertainment"]
+PLAYERS = ["No Online Multiplayer", "Online Multiplayer", "1 Player", "Up to 4 "]
+EDITIONS = [" - Deluxe Edition", ": Game of the Year Edition", " Standard Editio...", "™", " Demo",
+            " - Season Pass"] # in purchase histories, not in metacritic's urlpaths
+SEQUELS = [" II", " III", " 2", " Remastered", " Remake"] # other games, with urlpaths of their own
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def titleFromUrlpath(urlpath):
+    return " ".join(word.capitalize() for word in urlpath.split("-"))
+
+
+def fakePage(platform, urlpath, kilobytes=100, revision=None, note=""):
+    """
+    one game page, always the same for the same platform & urlpath;
+    padded with navigation links and script to roughly 'kilobytes' size.
+    A 'revision' draws new user ratings, a 'note' only changes the html.
+    """
+    rnd = random.Random(platform + "/" + urlpath)
+    href = "/game/%s/%s" % (platform, urlpath)
+    title = titleFromUrlpath(urlpath)
+
+    if rnd.random() < 0.1: # not enough critics yet
+        metascore = '<div class="metascore_w xlarge game tbd">tbd</div>'
+        critics = '<span class="desc">No score yet</span>'
+    else:
+        metascore = ('<div class="metascore_w xlarge game positive">'
+                     '<span itemprop="ratingValue">%d</span></div>' % rnd.randint(30, 97))
+        critics = ('<span class="count"><a href="%s/critic-reviews">\n<span>\n    %d\n</span>'
+                   ' Critic Reviews</a></span>' % (href, rnd.randint(4, 120)))
+
+    if rnd.random() < 0.15: # not enough users yet
+        userscore = '<div class="metascore_w user large game tbd">tbd</div>'
+        users = ('<span class="connect4_msg">Awaiting %d more rating%s</span>'
+                 % ((lambda n: (n, "s" if n > 1 else ""))(rnd.randint(1, 3))))
+    else:
+        userscore = '<div class="metascore_w user large game mixed">%.1f</div>' % (rnd.randint(10, 95) / 10)
+        users = '<span class="count"><a href="%s/user-reviews">%d Ratings</a></span>' % (href, rnd.randint(4, 9000))
+    if revision is not None: # the users kept rating
+        later = random.Random("%s/%s/%s" % (platform, urlpath, revision))
+        userscore = '<div class="metascore_w user large game mixed">%.1f</div>' % (later.randint(10, 95) / 10)
+        users = '<span class="count"><a href="%s/user-reviews">%d Ratings</a></span>' % (href, later.randint(4, 9000))
+
+    publishers = rnd.sample(COMPANIES, rnd.choice([1, 1, 2]))
+    released = "%s %d, %d" % (rnd.choice(MONTHS), rnd.randint(1, 28), rnd.randint(2005, 2025))
+    genres = rnd.sample(GENRES, rnd.randint(1, 5))
+    players = ('<li class="summary_detail product_players"><span class="label"># of players:</span>\n'
+               '<span class="data">%s</span></li>\n' % rnd.choice(PLAYERS)) if rnd.random() < 0.7 else ""
+
+    navigation = "\n".join('<li><a href="/browse/%d">Browse %d</a></li>' % (n, n) for n in range(40))
+    details = "\n".join(
+        '<li class="summary_detail"><span class="label">Detail %d:</span> <span class="data">%s</span></li>'
+        % (n, rnd.choice(GENRES)) for n in range(20))
+    page = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<title>%(title)s for %(platform)s Reviews - Metacritic</title>
+<script type="text/javascript">var metacritic = {"page": "%(href)s"};</script>
+</head>
+<body class="game_product">
+<div id="masthead"><ul class="nav">
+%(navigation)s
+</ul></div>
+<div class="product_title"><a href="%(href)s"><h1>%(title)s</h1></a></div>
+<ul class="summary_details">
+<li class="summary_detail publisher"><span class="label">Publisher:</span>
+<span class="data">
+%(publishers)s
+</span></li>
+<li class="summary_detail release_data"><span class="label">Release Date:</span>
+<span class="data">%(released)s</span></li>
+</ul>
+<div class="score_summary metascore_summary"><a class="metascore_anchor" href="%(href)s/critic-reviews">%(metascore)s</a>
+<div class="summary"><p>%(critics)s</p></div>
+</div>
+<div class="userscore_wrap feature_userscore"><a class="metascore_anchor" href="%(href)s/user-reviews">%(userscore)s</a>
+<div class="summary"><p>%(users)s</p></div>
+</div>
+<div class="section product_details"><ul>
+<li class="summary_detail release_data"><span class="label">Release Date:</span>
+<span class="data">%(released)s</span></li>
+<li class="summary_detail developer"><span class="label">Developer:</span>
+<span class="data">%(developer)s</span></li>
+<li class="summary_detail product_genre"><span class="label">Genre(s): </span>%(genres)s</li>
+%(players)s%(details)s
+</ul></div>
+""" % dict(title=title, platform=platform, href=href, navigation=navigation,
+           publishers=",\n".join('<a href="/company/%d">%s</a>' % (n, p) for n, p in enumerate(publishers)),
+           released=released, metascore=metascore, critics=critics, userscore=userscore,
+           users=users, developer=rnd.choice(COMPANIES), players=players, details=details,
+           genres=", ".join('<span class="data">%s</span>' % g for g in genres))
+
+    page += note
+    padding = max(0, kilobytes * 1024 - len(page))
+    page += '<script type="text/javascript">\nvar padding = "%s";\n</script>\n' % ("x" * padding)
+    return page + "</body>\n</html>\n"
+
+
+def platformsOf(urlpath, platformsOrdered, missRate):
+    """on which platforms that game 'exists': each one with probability 1-missRate"""
+    rnd = random.Random(urlpath)
+    return [platform for platform in platformsOrdered if rnd.random() >= missRate]
+
+
+def baseTitle(i):
+    return "Synthetic Game %d: The %s" % (i, random.Random(i).choice(GENRES))
+
+
+def titleVariant(i, variantRate=0.0, sequelRate=0.0):
+    """("edition", suffix), ("sequel", suffix) or (None, ""): what purchaseTitle(i) adds to baseTitle(i)"""
+    rnd = random.Random("variant %d" % i)
+    chance = rnd.random()
+    if chance < variantRate:
+        return "edition", rnd.choice(EDITIONS)
+    if chance < variantRate + sequelRate:
+        return "sequel", rnd.choice(SEQUELS)
+    return None, ""
+
+
+def purchaseTitle(i, variantRate=0.0, sequelRate=0.0):
+    """baseTitle(i), but that share of them as some edition, demo, ... of it, and that share as a sequel or remaster"""
+    return baseTitle(i) + titleVariant(i, variantRate, sequelRate)[1]
+
+
+def fakePurchaseHistory(filename, titles, contentStart="Purchase History\n", contentEnd="BACK TO TOP\n",
+                        variantRate=0.0, sequelRate=0.0):
+    """an export like PurchaseHistory_plaintext.txt, with that many made-up titles"""
+    with open(filename, "w") as f:
+        f.write("PURCHASE HISTORY\n\n" + contentStart)
+        f.write("DATE\tDESCRIPTION\tPRICE\tSTATUS\t\n")
+        for i in range(titles):
+            f.write("12/%d/2022\t%s\t€0.00\tPurchased\t\n"
+                    % (i % 28 + 1, purchaseTitle(i, variantRate, sequelRate)))
+        f.write(contentEnd)
+
+
+class FakeMetacriticServer(ThreadingHTTPServer):
+    """
+    serves fakePage()s under /game/<platform>/<urlpath> on localhost, and 404
+    for games not on that platform; each answer is delayed by 'latency' seconds
+    (plus up to 'jitter'). Records (seconds, status) of every request.
+    With a 'catalogue' (set of urlpaths), only those exist.
+    Answers If-None-Match with 304. After 'generation' is raised, that share of the
+    pages has new ratings ('changeRate'), or only some other html ('cosmeticRate').
+    More than 'maxRate' requests per second (0 = any) are answered with 429 and
+    'Retry-After: retryAfter', and count as 'throttled'.
+    """
+    daemon_threads = True
+
+    def __init__(self, platformsOrdered, missRate=0.3, latency=0.0, jitter=0.0, kilobytes=100, port=0,
+                 catalogue=None, changeRate=0.0, cosmeticRate=0.0, maxRate=0.0, retryAfter=1):
+        super().__init__(("127.0.0.1", port), FakeMetacriticHandler)
+        self.platformsOrdered, self.catalogue = platformsOrdered, catalogue
+        self.generation, self.changeRate, self.cosmeticRate = 0, changeRate, cosmeticRate
+        self.bytesSent = 0
+        self.maxRate, self.retryAfter = maxRate, retryAfter
+        self.tokens, self.lastToken, self.throttled = max(1.0, maxRate), time.monotonic(), 0
+        self.missRate, self.latency, self.jitter, self.kilobytes = missRate, latency, jitter, kilobytes
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d/game" % self.server_address[1]
+
+    def page(self, platform, urlpath):
+        """that page as of the current generation"""
+        revision, note = None, ""
+        for generation in range(1, self.generation + 1):
+            change = random.Random("%s/%s/%d" % (platform, urlpath, generation)).random()
+            if change < self.changeRate:
+                revision = generation
+            elif change < self.changeRate + self.cosmeticRate:
+                note = "<!-- generation %d -->\n" % generation
+        return fakePage(platform, urlpath, self.kilobytes, revision, note)
+
+    def admit(self):
+        """False if the client is above maxRate (a token bucket of one second)"""
+        if self.maxRate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(max(1.0, self.maxRate), self.tokens + (now - self.lastToken) * self.maxRate)
+            self.lastToken = now
+            if self.tokens < 1:
+                self.throttled += 1
+                return False
+            self.tokens -= 1
+            return True
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeMetacriticHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    disable_nagle_algorithm = True # else headers and body wait for a delayed ACK
+
+    def do_GET(self):
+        started = time.perf_counter()
+        server = self.server
+        parts = self.path.strip("/").split("/")
+        status, body = 404, b"<html><body>404 Page Not Found</body></html>"
+        if not server.admit():
+            status, body = 429, b"<html><body>429 Too Many Requests</body></html>"
+        elif len(parts) == 3 and parts[0] == "game" and \
+                (server.catalogue is None or parts[2] in server.catalogue) and \
+                parts[1] in platformsOf(parts[2], server.platformsOrdered, server.missRate):
+            status, body = 200, server.page(parts[1], parts[2]).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        time.sleep(server.latency + random.random() * server.jitter)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if status == 429:
+            self.send_header("Retry-After", str(server.retryAfter))
+        elif status != 404:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.requests.append((time.perf_counter() - started, status))
+            server.bytesSent += len(body)
+
+    def log_message(self, format, *args):
+        pass
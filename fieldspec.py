@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+######################################################
+#  fieldspec.py
+#
+#   since 18/10/2026
+#
+#  where each field is on a metacritic page, as data
+#   (FIELDS), instead of one hand-written function per
+#    group of fields. Compiled once per parser backend,
+#     then run over every page; a field that is not
+#      there gets its default, and is recorded as failed,
+#       but the rest of the page still counts.
+#  ValidationReport: which fields failed how often, at
+#   the end of a run of the parser, and which pages
+#    could not be parsed at all.
+######################################################
+
+import collections
+
+# 'path': elements, each inside the one before: (tag, {attribute: value});
+#   'class~' = has that class, 'class^' = class attribute begins with that,
+#   '%(urlpath)s' = the page's /game/<platform>/<urlpath>. 'unique': exactly one
+#   element for the last step. 'optionalFrom': a missing element from that step
+#   on is normal, i.e. the default without a failure (e.g. no critic reviews yet).
+# 'after': the line after that line of the body text; 'startswith': the line that
+#   begins so; 'between': the lines between two lines, joined. 'optional': missing is normal.
+# 'find' holds alternatives, tried in order; 'convert' the text into the value.
+METASCORE_BOX = ("div", {"class": "score_summary metascore_summary"})
+USERSCORE_BOX = ("div", {"class": "userscore_wrap feature_userscore"})
+SUMMARY = ("div", {"class~": "summary"})
+
+FIELDS = {
+    "metascore":      {"find": [{"path": [METASCORE_BOX, ("span", {"itemprop": "ratingValue"})], "optionalFrom": 1}],
+                       "convert": "int", "default": 0},
+    "metascoreBased": {"find": [{"path": [METASCORE_BOX, SUMMARY, ("a", {"href": "%(urlpath)s/critic-reviews"}),
+                                          ("span", {})], "optionalFrom": 2}],
+                       "convert": "int", "default": 0},
+    "userscore":      {"find": [{"path": [USERSCORE_BOX, ("div", {"class^": "metascore_w user large game"})],
+                                 "unique": True}],
+                       "convert": "score", "default": 0},
+    # if there aren't enough ratings yet, they don't tell us how many there are, but how many are still missing
+    "userscoreBased": {"find": [{"path": [USERSCORE_BOX, SUMMARY, ("a", {"href": "%(urlpath)s/user-reviews"})],
+                                 "convert": "ratings"},
+                                {"path": [USERSCORE_BOX, SUMMARY, ("span", {"class~": "connect4_msg"})],
+                                 "convert": "awaiting"}],
+                       "default": 0},
+    "nops":           {"find": [{"after": "# of players:", "optional": True}], "default": ""},
+    "developer":      {"find": [{"after": "Developer:"}], "default": ""},
+    "released":       {"find": [{"after": "Release Date:"}], "default": ""},
+    "genres":         {"find": [{"startswith": "Genre(s):"}], "convert": "genres", "default": ""},
+    "publisher":      {"find": [{"between": ["Publisher:", "Release Date:"]}], "default": ""},
+}
+
+CONVERTERS = {
+    "text":     lambda text: text.strip(),
+    "int":      lambda text: int(text.strip()),
+    "score":    lambda text: 0 if text.strip() == "tbd" else float(text.strip()),
+    "ratings":  lambda text: int(text.replace("Ratings", "").strip()),
+    "awaiting": lambda text: -int(text.strip().replace("Awaiting", "").replace("more rating", "").replace("s", "")),
+    "genres":   lambda text: text.replace("Genre(s):", "").replace(" ", ""),
+}
+
+
+class Missing(Exception):
+    """this alternative found nothing; 'normal' if that is no failure (see optionalFrom)"""
+    def __init__(self, reason, normal=False):
+        super().__init__(reason)
+        self.normal = normal
+
+
+def stepKey(step):
+    tag, attributes = step
+    return tag, tuple(sorted(attributes.items()))
+
+
+def describe(step):
+    tag, attributes = step
+    return tag + "".join("[%s=%s]" % item for item in sorted(attributes.items()))
+
+
+class Bs4Steps(object):
+    """the steps of a path as BeautifulSoup find() calls (html5lib backend)"""
+
+    @staticmethod
+    def compile(step):
+        tag, attributes = step
+        attrs = {("class" if key == "class~" else key): value for key, value in attributes.items() if key != "class^"}
+        prefix = attributes.get("class^")
+        templated = [key for key, value in attrs.items() if "%(urlpath)s" in value]
+
+        def find(node, urlpath, unique=False):
+            wanted = dict(attrs)
+            for key in templated:
+                wanted[key] = attrs[key] % {"urlpath": urlpath}
+            if prefix is None and not unique:
+                found = node.find(tag, attrs=wanted)
+                return [found] if found is not None else []
+            found = node.find_all(tag, attrs=wanted)
+            if prefix is not None: # as CSS [class^=..]: the whole class attribute
+                found = [element for element in found if " ".join(element.get("class", ())).startswith(prefix)]
+            return found
+        return find
+
+    @staticmethod
+    def text(element):
+        return element.text
+
+    @staticmethod
+    def bodyText(tree):
+        return tree.body.text
+
+
+class LxmlSteps(object):
+    """the steps of a path as precompiled XPath expressions (lxml backend)"""
+
+    @staticmethod
+    def literal(value):
+        if "'" in value:
+            raise ValueError("no ' in field spec values, please: %r" % value)
+        return "'%s'" % value
+
+    @classmethod
+    def compile(cls, step):
+        from lxml import etree # pip3 install lxml
+        tag, attributes = step
+        tests = []
+        for key, value in sorted(attributes.items()):
+            if "%(urlpath)s" in value:
+                before, after = value.split("%(urlpath)s")
+                expected = "concat(%s, $urlpath, %s)" % (cls.literal(before), cls.literal(after))
+            else:
+                expected = cls.literal(value)
+            if key == "class~": # what bs4 does for a single class name
+                tests.append("contains(concat(' ', normalize-space(@class), ' '), concat(' ', %s, ' '))" % expected)
+            elif key == "class^":
+                tests.append("starts-with(@class, %s)" % expected)
+            else:
+                tests.append("@%s=%s" % (key, expected))
+        xpath = etree.XPath(".//" + tag + "".join("[%s]" % test for test in tests))
+
+        def find(node, urlpath, unique=False):
+            found = xpath(node, urlpath=urlpath)
+            return found if unique else found[:1]
+        return find
+
+    @staticmethod
+    def text(element):
+        return element.text_content()
+
+    @staticmethod
+    def bodyText(tree):
+        return tree.body.text_content()
+
+
+STEPS = {"html5lib": Bs4Steps, "lxml": LxmlSteps}
+
+
+class FieldExtractor(object):
+    """
+    FIELDS compiled once for one parser backend ("html5lib" or "lxml"):
+    extract(tree, urlpath) -> (resultsDict, {field: why it failed})
+    """
+
+    def __init__(self, backend="html5lib", fields=FIELDS):
+        self.steps = STEPS[backend]
+        self.prefixes = {} # path prefix: its id, so that e.g. the metascore box is found once per page
+        self.finders = []  # id: (id of the prefix one step shorter, find function, step)
+        self.fields = [(name, [self.compileAlternative(alternative, spec) for alternative in spec["find"]],
+                        spec.get("default")) for name, spec in fields.items()]
+
+    def compilePath(self, path):
+        """[prefix id per step]"""
+        ids, parent, key = [], None, ()
+        for step in path:
+            key += (stepKey(step),)
+            if key not in self.prefixes:
+                self.prefixes[key] = len(self.finders)
+                self.finders.append((parent, self.steps.compile(step), step))
+            parent = self.prefixes[key]
+            ids.append(parent)
+        return ids
+
+    def compileAlternative(self, alternative, spec):
+        convert = CONVERTERS[alternative.get("convert", spec.get("convert", "text"))]
+        if "path" in alternative:
+            ids = self.compilePath(alternative["path"])
+            optionalFrom = alternative.get("optionalFrom", len(ids))
+            return ("path", ids, optionalFrom, alternative.get("unique", False), convert)
+        for kind in ("after", "startswith", "between"):
+            if kind in alternative:
+                return (kind, alternative[kind], alternative.get("optional", False), convert)
+        raise ValueError("field spec without path/after/startswith/between: %r" % alternative)
+
+    def element(self, memo, prefix, tree, urlpath):
+        """first element of that path prefix, found once per page; None if not there"""
+        if prefix not in memo:
+            parent, find, step = self.finders[prefix]
+            node = tree if parent is None else self.element(memo, parent, tree, urlpath)
+            found = find(node, urlpath) if node is not None else []
+            memo[prefix] = found[0] if found else None
+        return memo[prefix]
+
+    def findPath(self, memo, tree, urlpath, ids, optionalFrom, unique):
+        for i, prefix in enumerate(ids):
+            if i == len(ids) - 1 and unique:
+                parent = self.element(memo, ids[i - 1], tree, urlpath) if i else tree
+                found = self.finders[prefix][1](parent, urlpath, unique=True) if parent is not None else []
+                if len(found) != 1:
+                    raise Missing("%d x %s" % (len(found), describe(self.finders[prefix][2])), i >= optionalFrom)
+                return self.steps.text(found[0])
+            if self.element(memo, prefix, tree, urlpath) is None:
+                raise Missing("no " + describe(self.finders[prefix][2]), i >= optionalFrom)
+        return self.steps.text(memo[ids[-1]])
+
+    @staticmethod
+    def index(lines, first, line):
+        """where that line is first, or None; each line looked up once per page"""
+        if line not in first:
+            try:
+                first[line] = lines.index(line)
+            except ValueError:
+                first[line] = None
+        return first[line]
+
+    def findText(self, lines, first, kind, anchor, optional):
+        if kind == "after":
+            i = self.index(lines, first, anchor)
+            if i is None or i + 1 >= len(lines):
+                raise Missing("no line after %r" % anchor, optional)
+            return lines[i + 1]
+        if kind == "startswith":
+            for line in lines:
+                if line.startswith(anchor):
+                    return line
+            raise Missing("no line starting with %r" % anchor, optional)
+        i, j = self.index(lines, first, anchor[0]), self.index(lines, first, anchor[1])
+        if i is None or j is None:
+            raise Missing("no %r or %r" % tuple(anchor), optional)
+        return "".join(lines[i+1:j])
+
+    def extract(self, tree, urlpath, only=None):
+        """
+        all FIELDS (or only those) of one page's tree; failed fields get their default.
+        Raises ValueError if not one field is there: that is no game page at all.
+        """
+        resultsDict, failures = {}, {}
+        found = 0
+        memo, lines, first = {}, None, None
+        for name, alternatives, default in self.fields:
+            if only is not None and name not in only:
+                continue
+            reasons = []
+            for alternative in alternatives:
+                kind = alternative[0]
+                try:
+                    if kind == "path":
+                        text = self.findPath(memo, tree, urlpath, *alternative[1:4])
+                    else:
+                        if lines is None: # the body text, once, and only if needed
+                            lines = [line.strip() for line in self.steps.bodyText(tree).split("\n") if line.strip()]
+                            first = {}
+                        text = self.findText(lines, first, kind, alternative[1], alternative[2])
+                except Missing as e:
+                    if e.normal:
+                        reasons = None
+                        break
+                    reasons.append(str(e))
+                    continue
+                except AttributeError as e: # e.g. no <body>
+                    reasons.append(repr(e))
+                    continue
+                try:
+                    resultsDict[name] = alternative[-1](text)
+                    found += 1
+                    break
+                except ValueError:
+                    reasons.append("cannot convert %r" % text.strip()[:40])
+            if name not in resultsDict:
+                resultsDict[name] = default
+                if reasons:
+                    failures[name] = "; ".join(dict.fromkeys(reasons)) # alternatives may fail alike
+        if not found and failures:
+            raise ValueError("none of the fields found, e.g. %s" % next(iter(failures.values())))
+        return resultsDict, failures
+
+
+class ValidationReport(object):
+    """per field: how many pages failed, and why (first example); plus the pages not parsed at all"""
+
+    def __init__(self):
+        self.pages = 0
+        self.failed = collections.Counter()
+        self.examples = {} # field: (page, reason)
+        self.incomplete = 0
+        self.unparsed = [] # (page, error)
+
+    def add(self, page, failures):
+        self.pages += 1
+        if failures:
+            self.incomplete += 1
+        for field, reason in failures.items():
+            self.failed[field] += 1
+            self.examples.setdefault(field, (page, reason))
+
+    def addUnparsed(self, page, error):
+        self.pages += 1
+        self.unparsed.append((page, error))
+
+    def countInto(self, metrics):
+        for field, n in self.failed.items():
+            metrics.count("fields: %s failed" % field, n)
+        if self.unparsed:
+            metrics.count("pages: not parsed", len(self.unparsed))
+
+    def summary(self):
+        complete = self.pages - self.incomplete - len(self.unparsed)
+        print ("\nvalidation: %d pages, %d complete, %d with failed fields, %d not parsed."
+               % (self.pages, complete, self.incomplete, len(self.unparsed)))
+        if self.failed:
+            print ("%-16s %6s  %s" % ("field", "pages", "first example"))
+            for field, n in self.failed.most_common():
+                page, reason = self.examples[field]
+                print ("%-16s %6d  %s: %s" % (field, n, page, reason))
+        for page, error in self.unparsed:
+            print ("NOT PARSED %s: %s" % (page, error))
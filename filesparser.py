@@ -12,19 +12,30 @@
 #       for LibreOffice Calc, to sort by column, etc.
 ######################################################
 
-import os, datetime, csv
-from pprint import pprint
-from bs4 import BeautifulSoup # pip3 install html5lib bs4 
-from settings import downloadsFolder, platformsOrdered 
-from settings import COLUMN_ORDER, EMPTY_COLUMNS
+import os, datetime, argparse, itertools, functools, hashlib
+import concurrent.futures
+from settings import downloadsFolder, platformsOrdered, pageStore
+from settings import COLUMN_ORDER, EMPTY_COLUMNS, PARSER_BACKEND, parseCacheFile
+from settings import RESULTS_FORMATS, METRICS, FIELD_SPEC
+from parsecache import ParseCache
+from pagestore import sharedPageStore
+from resultstable import ResultsTable, exportResults
+from metrics import openMetrics, Stopwatch
+from fieldspec import FieldExtractor, ValidationReport
+
+RATINGS = ("metascore", "metascoreBased", "userscore", "userscoreBased")
+
+# the code the results of a page depend on (see parserVersion)
+PARSER_SOURCES = ("filesparser.py", "lxmlparser.py", "fieldspec.py")
 
 
 def myfiles(downloadsFolder, platformsOrdered):
     """
     simply read all files that begin with pc_, switch_, playstation-4_
+    (downloadsFolder can also be any other page store, see pagestore.py)
     """
-    filenames = sorted([name for name in os.listdir(downloadsFolder) 
-                        if name.split("_")[0] in platformsOrdered])
+    filenames = sorted([platform + "_" + urlpath + ".html" for platform, urlpath
+                        in sharedPageStore(downloadsFolder).keys(platformsOrdered)])
     print ("Found %d files in folder '%s'." % (len(filenames), downloadsFolder))
     return filenames
 
@@ -53,7 +64,7 @@ def parseUserscore(soup, urlpath, resultsDict):
     # print (us.prettify())
     userscoreTags = us.select("div[class^=metascore_w\ user\ large\ game]") # begins with operator
     if len(userscoreTags) !=1: # protect against a case that shouldn't happen anyway 
-        raise Error("number of userscore tags not equal 1")
+        raise ValueError("number of userscore tags not equal 1")
     userscoreText = userscoreTags[0].text.strip()
     resultsDict["userscore"] = 0 if userscoreText=="tbd" else float(userscoreText)
 
@@ -102,52 +113,241 @@ def parseOtherInfos(soup, resultsDict):
     # print(i, j, resultsDict["publisher"])
 
 
-def parseMetacriticFiles(filenames, downloadsFolder):
+def makeSoup(page):
+    from bs4 import BeautifulSoup # pip3 install html5lib bs4; imported on the first page only
+    return BeautifulSoup(page, 'html5lib')
+
+
+@functools.lru_cache(maxsize=None)
+def parserBackend(name=PARSER_BACKEND):
     """
-    read all files, parse content on HTML tag level, and on text level
+    (makeTree, parseMetascore, parseUserscore, parseOtherInfos) of that backend:
+    "html5lib" = the functions above, "lxml" = same fields, but much faster
     """
-    filename2results={}
-    for i, name in enumerate(filenames): # [33:34]):
-        platform, rest = name.split("_")
-        game = rest.replace(".html", "")
-        resultsDict={"platform" : platform, "game": game}
-        urlpath = "/game/%s/%s" % (platform, game)
-        print (i, platform, game, end =": ") # urlpath, end=" ")
-
-        # read page file and turn into tag soup 
-        with open(os.path.join(downloadsFolder, name), "r") as f:
-            page = f.read()
-        soup = BeautifulSoup(page, 'html5lib')
-        # print(soup.prettify())
-
-        # metascore
-        parseMetascore(soup, urlpath, resultsDict)
-        print ("ms={metascore:d} ({metascoreBased:d} revs)".format(**resultsDict), end="")
-
-        # userscore
-        resultsDict["userscore"], resultsDict["userscoreBased"] = 0, 0
-        try: # there are faulty pages, with (tm) in the page URL, just ignore:
-            parseUserscore(soup, urlpath, resultsDict)
-        except:
-            pass
-        print ("; us={userscore:.1f} ({userscoreBased:d} revs)".format(**resultsDict), end="")
-
-        # various other infos
-        parseOtherInfos(soup, resultsDict)
-        mystring="; released={released:s}; Dev={developer:s}; Publ={publisher:s}; Genres={genres:s}; #plyrs={nops:s}"
-        print (mystring.format(**resultsDict))
-
-        # append to results dict
-        filename2results[game+"_"+platform] = resultsDict
+    if name == "lxml":
+        import lxmlparser # pip3 install lxml
+        return (lxmlparser.makeTree, lxmlparser.parseMetascore,
+                lxmlparser.parseUserscore, lxmlparser.parseOtherInfos)
+    if name == "html5lib":
+        return makeSoup, parseMetascore, parseUserscore, parseOtherInfos
+    raise ValueError("unknown PARSER_BACKEND '%s'" % name)
+
+
+@functools.lru_cache(maxsize=None)
+def fieldExtractor(name=PARSER_BACKEND, spec=FIELD_SPEC):
+    """the fieldspec.FIELDS compiled for that backend, once per process; None = the functions above"""
+    return FieldExtractor(name) if spec else None
+
+
+@functools.lru_cache(maxsize=None)
+def parserVersion(backend=PARSER_BACKEND):
+    """
+    what the results of a page depend on, besides the page: the backend, FIELD_SPEC
+    and the parser code; a ParseCache entry of another version is parsed again
+    """
+    digest = hashlib.sha1(repr((backend, FIELD_SPEC)).encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_SOURCES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def openParseCache(backend=PARSER_BACKEND):
+    """the ParseCache of parseCacheFile, for that backend; None if there is none"""
+    return ParseCache(parseCacheFile, parserVersion(backend)) if parseCacheFile else None
+
+
+def parsePage(page, platform, game, backend=None, stopwatch=None, extractor=None):
+    """
+    all results for one page; 'backend' as returned by parserBackend();
+    a metrics.Stopwatch gets the seconds of each step.
+    With a fieldExtractor(), that finds all fields instead (so the backend's
+    parse functions are not used); the ones it could not find are in
+    resultsDict["failedFields"] = {field: why}, with their default values.
+    """
+    makeTree, parseMs, parseUs, parseOther = backend or parserBackend()
+    lap = stopwatch.lap if stopwatch else lambda stage: None
+    resultsDict={"platform" : platform, "game": game}
+    urlpath = "/game/%s/%s" % (platform, game)
+
+    # turn page into tag soup
+    soup = makeTree(page)
+    lap("parse: tree")
+    # print(soup.prettify())
+
+    if extractor:
+        fields, failures = extractor.extract(soup, urlpath)
+        resultsDict.update(fields)
+        if failures:
+            resultsDict["failedFields"] = failures
+        lap("parse: fields (spec)")
+        return resultsDict
+
+    # metascore
+    parseMs(soup, urlpath, resultsDict)
+    lap("parse: metascore")
+
+    # userscore
+    resultsDict["userscore"], resultsDict["userscoreBased"] = 0, 0
+    try: # there are faulty pages, with (tm) in the page URL, just ignore:
+        parseUs(soup, urlpath, resultsDict)
+    except (AttributeError, IndexError, ValueError):
+        pass
+    lap("parse: userscore")
+
+    # various other infos
+    parseOther(soup, resultsDict)
+    lap("parse: other infos")
+    return resultsDict
+
 
+def parseRatings(page, platform, game, backend=None, extractor=None):
+    """
+    only metascore, userscore and their review counts, i.e. parsePage without the text fields;
+    with a fieldExtractor(), the ratings not found are in resultsDict["failedFields"], as in
+    parsePage; it raises only if none of them is there, i.e. that is no game page
+    """
+    makeTree, parseMs, parseUs, parseOther = backend or parserBackend()
+    urlpath = "/game/%s/%s" % (platform, game)
+    soup = makeTree(page)
+    if extractor:
+        resultsDict, failures = extractor.extract(soup, urlpath, only=RATINGS)
+        if failures:
+            resultsDict["failedFields"] = failures
+        return resultsDict
+    resultsDict={"userscore": 0, "userscoreBased": 0}
+    parseMs(soup, urlpath, resultsDict)
+    try: # as in parsePage
+        parseUs(soup, urlpath, resultsDict)
+    except (AttributeError, IndexError, ValueError):
+        pass
+    return resultsDict
+
+
+def parseMetacriticPage(page, platform, game, backend=PARSER_BACKEND, stopwatch=None):
+    """
+    parse one page; returns (key, resultsDict, progress line, seconds per step)
+    """
+    stopwatch = stopwatch or (Stopwatch() if METRICS else None)
+    resultsDict = parsePage(page, platform, game, parserBackend(backend), stopwatch=stopwatch,
+                            extractor=fieldExtractor(backend))
+
+    line = "%s %s: " % (platform, game) # urlpath
+    line += "ms={metascore:d} ({metascoreBased:d} revs)".format(**resultsDict)
+    line += "; us={userscore:.1f} ({userscoreBased:d} revs)".format(**resultsDict)
+    mystring="; released={released:s}; Dev={developer:s}; Publ={publisher:s}; Genres={genres:s}; #plyrs={nops:s}"
+    line += mystring.format(**resultsDict)
+    if "failedFields" in resultsDict:
+        line += "; FAILED: " + ", ".join(resultsDict["failedFields"])
+    return game+"_"+platform, resultsDict, line, stopwatch.seconds if stopwatch else {}
+
+
+def parseMetacriticFile(name, downloadsFolder, backend=PARSER_BACKEND):
+    """
+    read and parse one file; returns (key, resultsDict, progress line, seconds per step)
+    """
+    platform, rest = name.split("_")
+    game = rest.replace(".html", "")
+    stopwatch = Stopwatch() if METRICS else None
+
+    # read page file
+    page = sharedPageStore(downloadsFolder).get(platform, game)
+    if stopwatch:
+        stopwatch.lap("store: read page")
+    return parseMetacriticPage(page, platform, game, backend, stopwatch)
+
+
+def tryParseMetacriticFile(name, downloadsFolder, backend=PARSER_BACKEND):
+    """parseMetacriticFile, but a page that can't be parsed at all gives resultsDict None, and the error as line"""
+    try:
+        return parseMetacriticFile(name, downloadsFolder, backend)
+    except Exception as e: # one malformed page must not throw away the whole batch
+        return None, None, "COULD NOT PARSE %s: %r" % (name, e), {}
+
+
+def addParseTimings(metrics, name, seconds):
+    """the seconds per step of one page (measured in a parser process) into the metrics"""
+    for stage, s in seconds.items():
+        metrics.add(stage, s, name)
+    metrics.add("parse: page total", sum(seconds.values()), name)
+    metrics.event("parse", page=name, ms=round(sum(seconds.values()) * 1e3, 3),
+                  steps={stage: round(s * 1e3, 3) for stage, s in seconds.items()})
+
+
+def parseMetacriticFiles(filenames, downloadsFolder, backend=PARSER_BACKEND, jobs=1, cache=None, metrics=None):
+    """
+    read all files, parse content on HTML tag level, and on text level;
+    with jobs>1 spread over that many processes, but results stay in filenames order;
+    with a ParseCache, only new or changed files are parsed;
+    timers and counters go into 'metrics' (default: a new one, see metrics.py);
+    ends with the fieldspec.ValidationReport: failed fields, and pages not parsed at all
+    """
+    ownMetrics = metrics is None
+    metrics = openMetrics() if ownMetrics else metrics
+    fingerprints, cached = {}, {}
+    if cache:
+        store = sharedPageStore(downloadsFolder)
+        for name in filenames:
+            platform, rest = name.split("_")
+            fingerprints[name] = store.fingerprint(platform, rest.replace(".html", ""))
+            resultsDict = cache.get(name, fingerprints[name])
+            if resultsDict is not None:
+                cached[name] = resultsDict
+        print ("%d files unchanged since last run, parsing %d." % (len(cached), len(filenames) - len(cached)))
+        metrics.count("parse cache: hits", len(cached))
+        metrics.count("parse cache: misses", len(filenames) - len(cached))
+    toParse = [name for name in filenames if name not in cached]
+
+    if jobs > 1 and toParse:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(tryParseMetacriticFile, toParse, itertools.repeat(downloadsFolder),
+                           itertools.repeat(backend), chunksize=max(1, min(16, len(toParse) // (4 * jobs))))
+    else:
+        pool = None
+        results = (tryParseMetacriticFile(name, downloadsFolder, backend) for name in toParse)
+    parsed = {}
+    report = ValidationReport()
+    for name, resultsDict in cached.items():
+        report.add(name, resultsDict.get("failedFields", {}))
+    try:
+        for i, (name, (key, resultsDict, line, seconds)) in enumerate(zip(toParse, results)): # only the main process prints
+            print (i, line)
+            if resultsDict is None: # not cached either, so tried again next run
+                report.addUnparsed(name, line)
+                continue
+            report.add(name, resultsDict.get("failedFields", {}))
+            addParseTimings(metrics, name, seconds)
+            parsed[name] = resultsDict
+            if cache:
+                cache.put(name, fingerprints[name], resultsDict)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        if cache:
+            cache.keepOnly(filenames)
+            cache.save()
+        report.countInto(metrics)
+        if ownMetrics:
+            metrics.summary("parse")
+            metrics.close()
+    report.summary()
+
+    # append to results dict, in filenames order
+    filename2results={}
+    for name in filenames:
+        if name not in cached and name not in parsed:
+            continue
+        resultsDict = cached[name] if name in cached else parsed[name]
+        filename2results[resultsDict["game"]+"_"+resultsDict["platform"]] = resultsDict
     return filename2results
 
 
 def compileGenres(filename2results):
     """
     Had hoped to sort by single genre, but ~75 genres are a bit much.
-    Idea for a TODO: Group these 75 genres into 7-10 genregroups, then
-    create new table with 7-10 genregroups as titles, and Y/N columns.
+    So analytics.py groups them (settings.GENRE_GROUPS) into a new
+    table with the genregroups as titles, and Y/N columns.
     """
     allGenres=[]
     for fn,r in filename2results.items():
@@ -161,42 +361,46 @@ def compileGenres(filename2results):
 
 
 def saveResults(filename2results, filename="MyEpicGamesOnMetacritic-%s.csv",
-                columnOrder=COLUMN_ORDER, folder=downloadsFolder):
+                columnOrder=COLUMN_ORDER, folder=downloadsFolder, allGenres=None, formats=RESULTS_FORMATS):
     """
-    results into a timestamped csv file, and genres into a txt file
+    results into a timestamped csv file (and/or the other formats), and genres into a txt file
     """
     timestamp=datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    os.makedirs(folder, exist_ok=True) # pages might be in a pageStore elsewhere
     fn=os.path.join(folder, filename % timestamp)
     
     columns = columnOrder
     if not EMPTY_COLUMNS:
         columns = [c for c in columnOrder if c!='']
 
-    with open(fn,"w", newline='') as f:
-        csvwriter = csv.writer(f, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        csvwriter.writerow(columnOrder)
-        for res in filename2results.values():
-            row=[res.get(c,"") for c in columns]
-            csvwriter.writerow(row)
-    print("saved to:", fn)
+    table = ResultsTable.fromResults(filename2results, columns)
+    for fnX in exportResults(table, fn.replace(".csv", ""), formats, columns):
+        print("saved to:", fnX)
 
-    allGenres = compileGenres(filename2results)
+    if allGenres is None:
+        allGenres = compileGenres(filename2results)
     fn2 = fn.replace(".csv", "_genres.txt")
     with open(fn2,"w") as f:
         for genre in allGenres:
             f.write(genre+"\n")
     print("saved to:", fn2)
+    return table
 
 
-def main(downloadsFolder, platformsOrdered):
+def main(downloadsFolder, platformsOrdered, jobs=1, backend=PARSER_BACKEND):
     filenames = myfiles(downloadsFolder, platformsOrdered)
-    filename2results = parseMetacriticFiles(filenames, downloadsFolder)
+    cache = openParseCache(backend)
+    filename2results = parseMetacriticFiles(filenames, downloadsFolder, backend=backend, jobs=jobs, cache=cache)
     # pprint(filename2results)
     print("\nREADY.")
     allGenres = compileGenres(filename2results)
     print("#genres=%d:\n%s" % (len(allGenres), allGenres))
-    saveResults(filename2results)
+    saveResults(filename2results, allGenres=allGenres)
     
 
 if __name__=="__main__":
-    main(downloadsFolder, platformsOrdered)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="parse all downloaded metacritic pages into a csv")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="parse in that many processes (0 = one per CPU core)")
+    args = parser.parse_args()
+    main(pageStore, platformsOrdered, jobs=args.jobs or os.cpu_count())
\ No newline at end of file
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+##############################################
+# httpcache.py
+#
+#   since 18/10/2026
+#
+#   remembers, per URL, the last HTTP status and
+#    the ETag / Last-Modified validators, so that
+#     re-runs skip known 404s (for NEGATIVE_TTL),
+#      and can ask "has it changed?" conditionally.
+##############################################
+
+import time
+import threading
+from jsonfile import loadJson, saveJson
+
+
+class CachedResponse(object):
+    """looks enough like a requests.Response for the downloader"""
+    def __init__(self, status_code, text="", headers=None, fromCache=True):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.fromCache = fromCache # False: metacritic was asked, but said 304
+
+
+class HttpCache(object):
+    """url -> {"status":.., "time":.., "etag":.., "lastModified":..}, persisted as json"""
+
+    NEGATIVE_STATUSES = (404, 410)
+
+    def __init__(self, filename, negativeTTL):
+        self.filename = filename
+        self.negativeTTL = negativeTTL
+        self.entries = loadJson(filename, {})
+        self.lock = threading.Lock()
+
+    def knownMiss(self, url):
+        """the remembered 404 status, if that is younger than negativeTTL; else None"""
+        entry = self.entries.get(url)
+        if (entry and entry["status"] in self.NEGATIVE_STATUSES
+                  and time.time() - entry["time"] < self.negativeTTL):
+            return entry["status"]
+        return None
+
+    def conditionalHeaders(self, url):
+        """If-None-Match / If-Modified-Since headers, from the last 200 for that url"""
+        entry = self.entries.get(url, {})
+        conditional = {}
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            conditional["If-Modified-Since"] = entry["lastModified"]
+        return conditional
+
+    def store(self, url, response):
+        if response.status_code == 304: # not modified, so keep the validators
+            with self.lock:
+                self.entries.setdefault(url, {"status": 200})["time"] = time.time()
+            return
+        entry = {"status": response.status_code, "time": time.time()}
+        if response.status_code == 200:
+            if response.headers.get("ETag"):
+                entry["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                entry["lastModified"] = response.headers["Last-Modified"]
+        with self.lock:
+            self.entries[url] = entry
+
+    def save(self):
+        with self.lock:
+            saveJson(self.filename, self.entries)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+######################################################
+#  jobqueue.py
+#
+#   since 18/10/2026
+#
+#  the state of every title of the purchase history,
+#   kept in SQLite while the downloader runs:
+#    pending -> in-flight -> done / failed, or ignored.
+#  Every change is committed at once, so an interrupted
+#   run loses nothing, and the next one resumes. Failed
+#    titles are retried after a backoff that depends on
+#     the HTTP status (settings.RETRY_POLICY), and
+#      'python3 downloader.py --retry-failures' looks at
+#       only those, not at the whole library.
+######################################################
+
+import json
+import time
+import sqlite3
+import threading
+
+PENDING, IN_FLIGHT, DONE, FAILED, IGNORED = "pending", "in-flight", "done", "failed", "ignored"
+STATES = [PENDING, IN_FLIGHT, DONE, FAILED, IGNORED]
+
+
+class JobQueue(object):
+    """title -> state, platform, last status, attempts, next try; one SQLite file"""
+
+    def __init__(self, filename, retryPolicy, defaultRetry):
+        self.filename = filename
+        self.retryPolicy, self.defaultRetry = retryPolicy, defaultRetry
+        self.lock = threading.Lock() # one connection, shared by the download threads
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL") # cheap commits: one per state change
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                               title TEXT PRIMARY KEY, game TEXT, state TEXT, platform TEXT,
+                               status INTEGER, attempts INTEGER DEFAULT 0, nextTry REAL DEFAULT 0,
+                               updated REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobsState ON jobs (state, nextTry)")
+        # in flight when the last run was stopped: start over with those
+        self.db.execute("UPDATE jobs SET state=? WHERE state=?", (PENDING, IN_FLIGHT))
+        self.db.commit()
+
+    def query(self, sql, *parameters):
+        with self.lock:
+            return self.db.execute(sql, parameters).fetchall()
+
+    def change(self, sql, *parameters):
+        with self.lock:
+            self.db.execute(sql, parameters)
+            self.db.commit()
+
+    def job(self, game):
+        """(state, status, attempts, nextTry) of that title, or None if new"""
+        rows = self.query("SELECT state, status, attempts, nextTry FROM jobs WHERE title=?", game[1])
+        return rows[0] if rows else None
+
+    def add(self, game):
+        """a new title is pending; known ones keep their state"""
+        with self.lock: # committed with the next state change
+            self.db.execute("INSERT OR IGNORE INTO jobs (title, game, state, updated) VALUES (?, ?, ?, ?)",
+                            (game[1], json.dumps(game), PENDING, time.time()))
+
+    def setState(self, game, state, platform=None, status=None):
+        self.change("UPDATE jobs SET state=?, platform=?, status=?, updated=? WHERE title=?",
+                    state, platform, status, time.time(), game[1])
+
+    def start(self, game):
+        self.setState(game, IN_FLIGHT)
+
+    def done(self, game, platform):
+        if (self.job(game) or (None,))[0] != DONE:
+            self.setState(game, DONE, platform, 200)
+
+    def ignore(self, game):
+        if (self.job(game) or (None,))[0] != IGNORED:
+            self.setState(game, IGNORED)
+
+    def fail(self, game, status):
+        """one more failed attempt; status None = no answer (timeout, connection error)"""
+        attempts = ((self.job(game) or (None, None, 0))[2] or 0) + 1
+        maxAttempts, backoff = self.retryPolicy.get(status, self.defaultRetry)
+        nextTry = time.time() + backoff * 2 ** (attempts - 1) if attempts < maxAttempts else float("inf")
+        self.change("UPDATE jobs SET state=?, platform=NULL, status=?, attempts=?, nextTry=?, updated=? WHERE title=?",
+                    FAILED, status, attempts, nextTry, time.time(), game[1])
+
+    def due(self):
+        """the games of all failed titles that may be retried now, in the order they were failed"""
+        rows = self.query("SELECT game FROM jobs WHERE state=? AND nextTry<=? ORDER BY updated",
+                          FAILED, time.time())
+        return [json.loads(row[0]) for row in rows]
+
+    def failures(self):
+        """[(title, status, attempts, nextTry)] of all failed titles, the next to be retried first"""
+        return self.query("SELECT title, status, attempts, nextTry FROM jobs WHERE state=? ORDER BY nextTry, title",
+                          FAILED)
+
+    def counts(self):
+        """{state: number of titles}"""
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.query("SELECT state, count(*) FROM jobs GROUP BY state"))
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.db.execute("UPDATE jobs SET state=? WHERE state=?", (PENDING, IN_FLIGHT)) # stopped midway
+            self.db.commit()
+            self.db.close()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+##############################################
+# jsonfile.py
+#
+#   since 18/10/2026
+#
+#   tiny helpers for the small json files that
+#    remember things between runs (caches etc.)
+##############################################
+
+import os
+import json
+
+
+def loadJson(filename, default):
+    """content of that json file, or 'default' if there is none (yet)"""
+    if not os.path.exists(filename):
+        return default
+    with open(filename) as f:
+        return json.load(f)
+
+
+def saveJson(filename, data):
+    """write to a temporary file first, so an interrupted run can't leave half a file"""
+    tmp = filename + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, filename)
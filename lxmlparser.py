@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+######################################################
+#  lxmlparser.py
+#
+#   since 18/10/2026
+#
+#  same fields as the parse* functions in filesparser,
+#    but on an lxml tree instead of a html5lib soup:
+#     lxml is written in C, html5lib in pure python.
+#  Select it with PARSER_BACKEND = "lxml" in settings.
+######################################################
+
+import lxml.html # pip3 install lxml
+
+# class attribute contains this one class (what bs4 does for a single class name)
+HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' %s ')"
+
+
+def makeTree(page):
+    return lxml.html.document_fromstring(page)
+
+
+def first(elements):
+    return elements[0] if elements else None
+
+
+def parseMetascore(tree, urlpath, resultsDict):
+    """
+    find the 'metascore' data in the page, by finding the relevant HTML tags
+    """
+    # metascore
+    ms = first(tree.xpath("//div[@class='score_summary metascore_summary']"))
+    metascoreFind = first(ms.xpath(".//span[@itemprop='ratingValue']"))
+    resultsDict["metascore"] = int(metascoreFind.text_content()) if metascoreFind is not None else 0
+
+    # metascore number of reviews
+    summary = first(ms.xpath(".//div[%s]" % HAS_CLASS % "summary"))
+    criticReviews = first(summary.xpath(".//a[@href=$href]", href='%s/critic-reviews' % urlpath))
+    resultsDict["metascoreBased"] = (int(first(criticReviews.xpath(".//span")).text_content().strip())
+                                     if criticReviews is not None else 0)
+
+
+def parseUserscore(tree, urlpath, resultsDict):
+    """
+    find the 'userscore' data in the page, by finding the relevant HTML tags
+    """
+    # userscore
+    us = first(tree.xpath("//div[@class='userscore_wrap feature_userscore']"))
+    userscoreTags = us.xpath(".//div[starts-with(@class, 'metascore_w user large game')]")
+    if len(userscoreTags) !=1: # protect against a case that shouldn't happen anyway
+        raise ValueError("number of userscore tags not equal 1")
+    userscoreText = userscoreTags[0].text_content().strip()
+    resultsDict["userscore"] = 0 if userscoreText=="tbd" else float(userscoreText)
+
+    # userscore number of reviews
+    usersummary = first(us.xpath(".//div[%s]" % HAS_CLASS % "summary"))
+    userReviews = first(usersummary.xpath(".//a[@href=$href]", href='%s/user-reviews' % urlpath))
+    answer=0
+    if userReviews is not None:
+        answer = int(userReviews.text_content().replace("Ratings","").strip())
+    else:
+        # if there aren't enough ratings yet,
+        # they don't tell us how many there are, but how many are still missing
+        um = first(usersummary.xpath(".//span[%s]" % HAS_CLASS % "connect4_msg")).text_content().strip()
+        answer = -int(um.replace("Awaiting","").replace("more rating","").replace("s",""))
+    resultsDict["userscoreBased"] = answer
+
+
+def parseOtherInfos(tree, resultsDict):
+    """
+    find other info in the page, by searching within the text body
+    """
+    # forget HTML, just parse the text
+    textlines = [lines.strip() for lines in tree.body.text_content().split("\n")
+                    if lines.strip() != ""]
+
+    # number of players
+    try:
+        nopsIndex = textlines.index("# of players:")
+        nops = textlines[nopsIndex+1] if nopsIndex else ""
+    except:
+        nops = ""
+    resultsDict["nops"]=nops
+
+    # developer company & release date
+    resultsDict["developer"] = textlines[textlines.index("Developer:")+1]
+    resultsDict["released"] = textlines[textlines.index("Release Date:")+1]
+
+    # genres are all in one line, but with many spaces inbetween
+    i = next(i for i,text in enumerate(textlines) if text.startswith("Genre(s):"))
+    resultsDict["genres"] = textlines[i].replace("Genre(s):", "").replace(" ", "")
+
+    i=textlines.index("Publisher:")
+    j=textlines.index("Release Date:")
+    resultsDict["publisher"] = "".join([line.strip() for line in textlines[i+1:j]])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+######################################################
+#  metrics.py
+#
+#   since 18/10/2026
+#
+#  where does the time go? per-stage timers and
+#   counters of one run (download, store, parse):
+#    * a summary table at the end of the run,
+#    * one JSON line per request / parsed page in
+#       the metricsFile (NDJSON), to find slow pages.
+#  METRICS = False in settings turns it all off:
+#   NO_METRICS then does nothing, at once.
+######################################################
+
+import json
+import time
+import datetime
+import threading
+import contextlib
+from settings import METRICS, metricsFile
+
+
+class Metrics(object):
+    """timers and counters; thread safe, one per run"""
+
+    def __init__(self, filename=None):
+        self.stages = {} # stage: [count, seconds, max seconds, key of the slowest]
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.run = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.file = open(filename, "a") if filename else None
+
+    def add(self, stage, seconds, key=None):
+        with self.lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, -1.0, None])
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2], entry[3] = seconds, key
+
+    @contextlib.contextmanager
+    def time(self, stage, key=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, key)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def event(self, kind, **fields):
+        """one line in the metricsFile, e.g. event("request", url=.., status=..)"""
+        if self.file:
+            line = json.dumps(dict(run=self.run, event=kind, **fields))
+            with self.lock:
+                self.file.write(line + "\n")
+
+    def summary(self, title="metrics"):
+        """print the table of stages and counters, and add it to the metricsFile"""
+        with self.lock:
+            stages = sorted(self.stages.items())
+            counters = sorted(self.counters.items())
+        print ("\n%s:\n%-34s %7s %9s %9s %9s  %s" % (title, "stage", "count", "total s", "mean ms", "max ms", "slowest"))
+        for stage, (count, seconds, longest, key) in stages:
+            print ("%-34s %7d %9.2f %9.2f %9.2f  %s"
+                   % (stage, count, seconds, seconds * 1e3 / count, longest * 1e3, key or ""))
+        for name, n in counters:
+            print ("%-34s %7d" % (name, n))
+        self.event("summary", title=title, counters=dict(counters),
+                   stages={stage: dict(count=count, seconds=round(seconds, 6), max=round(longest, 6), slowest=key)
+                           for stage, (count, seconds, longest, key) in stages})
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class NoMetrics(Metrics):
+    """the off switch: same methods, doing nothing"""
+
+    def __init__(self):
+        self.file = None
+
+    def add(self, stage, seconds, key=None):
+        pass
+
+    def time(self, stage, key=None):
+        return NULL_TIMER
+
+    def count(self, name, n=1):
+        pass
+
+    def event(self, kind, **fields):
+        pass
+
+    def summary(self, title="metrics"):
+        pass
+
+
+NULL_TIMER = contextlib.nullcontext()
+NO_METRICS = NoMetrics()
+
+
+def openMetrics(enabled=METRICS, filename=metricsFile):
+    return Metrics(filename) if enabled else NO_METRICS
+
+
+class Stopwatch(object):
+    """seconds per stage, for code in other processes: call lap(stage) after each stage"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + now - self.last
+        self.last = now
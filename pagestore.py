@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+######################################################
+#  pagestore.py
+#
+#   since 18/10/2026
+#
+#  where the downloaded pages are kept:
+#   * a folder with one <platform>_<urlpath>.html file
+#      per page (the original layout), or
+#   * one SQLite file, every page zlib-compressed,
+#      with the primary key (platform, urlpath),
+#   both scripts read and write only through this.
+#
+#    python3 pagestore.py metacritic metacritic.sqlite
+#       copies all pages from the folder into the
+#        SQLite file (or the other way round)
+######################################################
+
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import threading
+import functools
+
+
+class FolderStore(object):
+    """one <platform>_<urlpath>.html file per page"""
+
+    def __init__(self, folder):
+        self.location = folder
+        if not os.path.exists(folder):
+            os.mkdir(folder)
+
+    def filename(self, platform, urlpath):
+        return os.path.join(self.location, platform + "_" + urlpath + ".html")
+
+    def exists(self, platform, urlpath):
+        return os.path.exists(self.filename(platform, urlpath))
+
+    def get(self, platform, urlpath):
+        with open(self.filename(platform, urlpath), "r") as f:
+            return f.read()
+
+    def put(self, platform, urlpath, page):
+        with open(self.filename(platform, urlpath), "w") as f:
+            f.write(page)
+
+    def keys(self, platformsOrdered):
+        """sorted [(platform, urlpath)] of all pages of those platforms"""
+        keys = []
+        for name in os.listdir(self.location):
+            platform, _, rest = name.partition("_")
+            if platform in platformsOrdered and rest.endswith(".html"):
+                keys.append((platform, rest[:-len(".html")]))
+        return sorted(keys)
+
+    def fingerprint(self, platform, urlpath):
+        """changes whenever the page changes"""
+        st = os.stat(self.filename(platform, urlpath))
+        return st.st_size, st.st_mtime_ns
+
+    def stored(self, platform, urlpath):
+        """when that page was saved, in seconds since the epoch"""
+        return os.path.getmtime(self.filename(platform, urlpath))
+
+    def touch(self, platform, urlpath):
+        """the page is still up to date: stored now"""
+        os.utime(self.filename(platform, urlpath))
+
+    def close(self):
+        pass
+
+
+class SqliteStore(object):
+    """all pages in one SQLite file, zlib-compressed; O(1) lookups by (platform, urlpath)"""
+
+    def __init__(self, filename):
+        self.location = filename
+        self.lock = threading.Lock() # one connection, shared by the download threads
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                               platform TEXT, urlpath TEXT, stored INTEGER, page BLOB,
+                               PRIMARY KEY (platform, urlpath))""")
+        self.db.commit()
+
+    def query(self, sql, *parameters):
+        with self.lock:
+            return self.db.execute(sql, parameters).fetchall()
+
+    def exists(self, platform, urlpath):
+        return bool(self.query("SELECT 1 FROM pages WHERE platform=? AND urlpath=?", platform, urlpath))
+
+    def get(self, platform, urlpath):
+        rows = self.query("SELECT page FROM pages WHERE platform=? AND urlpath=?", platform, urlpath)
+        if not rows:
+            raise FileNotFoundError("no page %s_%s in %s" % (platform, urlpath, self.location))
+        return zlib.decompress(rows[0][0]).decode("utf-8")
+
+    def put(self, platform, urlpath, page, stored=None, commit=True):
+        blob = zlib.compress(page.encode("utf-8"))
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                            (platform, urlpath, stored or time.time_ns(), blob))
+            if commit:
+                self.db.commit()
+
+    def keys(self, platformsOrdered):
+        """sorted [(platform, urlpath)] of all pages of those platforms"""
+        return sorted((platform, urlpath) for platform, urlpath in self.query("SELECT platform, urlpath FROM pages")
+                      if platform in platformsOrdered)
+
+    def fingerprint(self, platform, urlpath):
+        """changes whenever the page changes"""
+        rows = self.query("SELECT length(page), stored FROM pages WHERE platform=? AND urlpath=?", platform, urlpath)
+        if not rows:
+            raise FileNotFoundError("no page %s_%s in %s" % (platform, urlpath, self.location))
+        return tuple(rows[0])
+
+    def stored(self, platform, urlpath):
+        """when that page was saved, in seconds since the epoch"""
+        return self.fingerprint(platform, urlpath)[1] / 1e9
+
+    def touch(self, platform, urlpath):
+        """the page is still up to date: stored now"""
+        with self.lock:
+            self.db.execute("UPDATE pages SET stored=? WHERE platform=? AND urlpath=?",
+                            (time.time_ns(), platform, urlpath))
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+def openPageStore(location):
+    """a SqliteStore for *.sqlite / *.db files, else a FolderStore"""
+    if location.endswith((".sqlite", ".db")):
+        return SqliteStore(location)
+    return FolderStore(location)
+
+
+def sharedPageStore(location):
+    """one store per location and process, e.g. in the parser processes"""
+    return openSharedPageStore(location, os.getpid()) # never reuse a connection across a fork
+
+
+@functools.lru_cache(maxsize=None)
+def openSharedPageStore(location, pid):
+    return openPageStore(location)
+
+
+def migrate(source, target, platformsOrdered):
+    """copy all pages from one store into another, keeping when they were stored"""
+    keys = source.keys(platformsOrdered)
+    for platform, urlpath in keys:
+        page = source.get(platform, urlpath)
+        if isinstance(target, SqliteStore): # one commit at the end (in close), not one per page
+            target.put(platform, urlpath, page, stored=int(source.stored(platform, urlpath) * 1e9), commit=False)
+        else:
+            target.put(platform, urlpath, page)
+            stored = source.stored(platform, urlpath)
+            os.utime(target.filename(platform, urlpath), (stored, stored))
+    print ("Copied %d pages from '%s' to '%s'." % (len(keys), source.location, target.location))
+
+
+if __name__ == "__main__":
+    from settings import platformsOrdered
+    if len(sys.argv) != 3:
+        print ("usage: python3 pagestore.py FROM TO   e.g.   python3 pagestore.py metacritic metacritic.sqlite")
+        sys.exit(1)
+    source, target = openPageStore(sys.argv[1]), openPageStore(sys.argv[2])
+    migrate(source, target, platformsOrdered)
+    source.close()
+    target.close()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+######################################################
+#  parsecache.py
+#
+#   since 18/10/2026
+#
+#  remembers the resultsDict of each parsed file,
+#    keyed on filename + size + mtime (or what the
+#     page store has instead), so re-runs only parse
+#      new or changed pages; and on the parser version
+#       (filesparser.parserVersion), so pages are also
+#        parsed again with another backend, settings
+#         or parser code.
+######################################################
+
+from jsonfile import loadJson, saveJson
+
+
+class ParseCache(object):
+    """filename -> {"size": .., "mtime": .., "parser": .., "results": resultsDict}, persisted as json"""
+
+    def __init__(self, filename, parser=None):
+        self.filename = filename
+        self.parser = parser # the version of the parser that gives the results now
+        self.entries = loadJson(filename, {})
+
+    def get(self, name, fingerprint):
+        """cached resultsDict if that file is unchanged (same store.fingerprint), and parsed by this parser; else None"""
+        entry = self.entries.get(name)
+        if entry and (entry["size"], entry["mtime"]) == tuple(fingerprint) and entry.get("parser") == self.parser:
+            return entry["results"]
+        return None
+
+    def results(self, name):
+        """the last resultsDict of that file, even if the file or the parser changed since; or None"""
+        entry = self.entries.get(name)
+        return entry["results"] if entry else None
+
+    def put(self, name, fingerprint, resultsDict):
+        self.entries[name] = {"size": fingerprint[0], "mtime": fingerprint[1], "parser": self.parser,
+                              "results": resultsDict}
+
+    def move(self, name, fingerprint):
+        """the file changed, but not its results (e.g. refreshed, same ratings): new fingerprint, same parser version"""
+        entry = self.entries.get(name)
+        if entry:
+            entry["size"], entry["mtime"] = fingerprint[0], fingerprint[1]
+
+    def keepOnly(self, names):
+        """forget files that are gone"""
+        names = set(names)
+        self.entries = {name: entry for name, entry in self.entries.items() if name in names}
+
+    def save(self):
+        saveJson(self.filename, self.entries)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+######################################################
+#  pipeline.py
+#
+#   since 18/10/2026
+#
+#  downloader.py and filesparser.py in one go:
+#    each page goes, as soon as it is downloaded,
+#     through a bounded queue to parser processes,
+#      and each result is appended to the csv at once.
+#    So the network waits and the CPU work overlap,
+#     and the total time is roughly the slower one.
+######################################################
+
+import os
+import csv
+import time
+import queue
+import datetime
+import argparse
+import threading
+import multiprocessing
+import concurrent.futures
+import downloader
+import filesparser
+from pagestore import openPageStore
+from metrics import openMetrics
+from fieldspec import ValidationReport
+from settings import epicHistoryFile, downloadsFolder, pageStore, COLUMN_ORDER, EMPTY_COLUMNS
+from settings import PARSER_BACKEND, PIPELINE_QUEUE, RESULTS_FORMATS
+from resultstable import ResultsTable, exportResults
+
+STOP = None # tells a parser thread that no more pages will come
+
+
+def parserContext():
+    """
+    how the parser processes start: not by forking this process, whose download threads
+    may hold locks at that moment (a forked child would wait for them forever)
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def parsePageOrFile(platform, urlpath, text, backend):
+    """runs in a parser process: the page text, or if None, its file"""
+    if text is None:
+        return filesparser.parseMetacriticFile(platform + "_" + urlpath + ".html", pageStore, backend)
+    return filesparser.parseMetacriticPage(text, platform, urlpath, backend)
+
+
+def runPipeline(epicHistoryFile, jobs=1, queueSize=PIPELINE_QUEUE, backend=PARSER_BACKEND,
+                filename="MyEpicGamesOnMetacritic-%s.csv", columnOrder=COLUMN_ORDER,
+                folder=downloadsFolder, printInfos=False, **downloadOptions):
+    """
+    download (see downloader.DownloadPages) and parse at the same time;
+    returns (failedDownloads, filename2results)
+    """
+    started = time.monotonic()
+    downloader.makeFolderUnlessExists(folder)
+    timestamp=datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    fn=os.path.join(folder, filename % timestamp)
+    columns = columnOrder if EMPTY_COLUMNS else [c for c in columnOrder if c!='']
+
+    store = openPageStore(pageStore)
+    metrics = openMetrics()
+    pages = queue.Queue(maxsize=queueSize) # full queue = downloader waits for the parsers
+    cache = filesparser.openParseCache(backend)
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=parserContext())
+    lock = threading.Lock() # for csv, cache, and printing
+    filename2results = {}
+    report = ValidationReport()
+
+    with open(fn, "w", newline='') as f:
+        csvwriter = csv.writer(f, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        csvwriter.writerow(columns)
+
+        def storeResult(key, resultsDict, line):
+            with lock:
+                filename2results[key] = resultsDict
+                report.add(resultsDict["platform"] + "_" + resultsDict["game"] + ".html", resultsDict.get("failedFields", {}))
+                csvwriter.writerow([resultsDict.get(c,"") for c in columns])
+                f.flush()
+                print (len(filename2results), line)
+
+        def parserThread():
+            # one thread per parser process, each waits for its page's result
+            while True:
+                item = pages.get()
+                if item is STOP:
+                    return
+                platform, urlpath, text, fingerprint = item
+                try:
+                    key, resultsDict, line, seconds = pool.submit(parsePageOrFile, platform, urlpath, text, backend).result()
+                except Exception as e: # one bad page must not stop the others
+                    with lock:
+                        report.addUnparsed(platform + "_" + urlpath + ".html", repr(e))
+                    continue
+                filesparser.addParseTimings(metrics, platform + "_" + urlpath + ".html", seconds)
+                storeResult(key, resultsDict, line)
+                if cache:
+                    with lock:
+                        cache.put(platform + "_" + urlpath + ".html", fingerprint, resultsDict)
+
+        def onPage(platform, urlpath, text):
+            name = platform + "_" + urlpath + ".html"
+            fingerprint = store.fingerprint(platform, urlpath)
+            if text is None and cache:
+                with lock:
+                    resultsDict = cache.get(name, fingerprint)
+                metrics.count("parse cache: hits" if resultsDict is not None else "parse cache: misses")
+                if resultsDict is not None: # unchanged page, parsed before
+                    storeResult(urlpath + "_" + platform, resultsDict, "%s %s: from parse cache" % (platform, urlpath))
+                    return
+            pages.put((platform, urlpath, text, fingerprint))
+
+        threads = [threading.Thread(target=parserThread) for _ in range(jobs)]
+        for thread in threads:
+            thread.start()
+        try:
+            toDownload = downloader.iterDownloadList(downloader.iterEpicgamesPurchaseHistoryFile(epicHistoryFile))
+            failedDownloads = downloader.DownloadPages(toDownload, printInfos=printInfos, onPage=onPage,
+                                                       store=store, metrics=metrics, **downloadOptions)
+        finally:
+            for thread in threads:
+                pages.put(STOP)
+            for thread in threads:
+                thread.join()
+            pool.shutdown()
+            store.close()
+            if cache:
+                cache.save()
+    print("saved to:", fn)
+    otherFormats = [format for format in RESULTS_FORMATS if format != "csv"] # the csv is written already
+    if otherFormats:
+        table = ResultsTable.fromResults(filename2results, columns)
+        for fnX in exportResults(table, fn.replace(".csv", ""), otherFormats):
+            print("saved to:", fnX)
+
+    allGenres = filesparser.compileGenres(filename2results)
+    fn2 = fn.replace(".csv", "_genres.txt")
+    with open(fn2,"w") as f:
+        for genre in allGenres:
+            f.write(genre+"\n")
+    print("saved to:", fn2)
+
+    report.countInto(metrics)
+    metrics.summary("download + parse")
+    metrics.close()
+    report.summary()
+    print("\nREADY. %d pages parsed, %d failed downloads, in %.1f seconds."
+          % (len(filename2results), len(failedDownloads), time.monotonic() - started))
+    return failedDownloads, filename2results
+
+
+def main(epicHistoryFile, jobs=1, **downloadOptions):
+    failedDownloads, filename2results = runPipeline(epicHistoryFile, jobs=jobs, **downloadOptions)
+    downloader.failedDownloadsPrettyPrint(failedDownloads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="download and parse at the same time")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="parse in that many processes (0 = one per CPU core)")
+    args = parser.parse_args()
+    main(epicHistoryFile, jobs=args.jobs or os.cpu_count())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+##############################################
+# platformindex.py
+#
+#   since 18/10/2026
+#
+#   remembers for each urlpath which platform
+#    resolved it (or that all platforms failed),
+#     so re-runs need no stat per platform, and
+#      no requests that are known to fail anyway
+#       (a 404 or 410 on every platform).
+##############################################
+
+import time
+from jsonfile import loadJson, saveJson
+from httpcache import HttpCache
+
+
+class PlatformIndex(object):
+    """urlpath -> {"platform": .. or None, "status": .., "time": ..}, persisted as json"""
+
+    def __init__(self, filename, store, platformsOrdered):
+        self.filename = filename
+        self.entries = loadJson(filename, None)
+        if self.entries is None: # first run: one listing of the page store instead of many lookups
+            self.entries = self.fromStore(store, platformsOrdered)
+
+    @staticmethod
+    def fromStore(store, platformsOrdered):
+        entries = {}
+        for platform, urlpath in store.keys(platformsOrdered):
+            known = entries.get(urlpath)
+            # several platforms stored: the downloader would use the first in platformsOrdered
+            if known and platformsOrdered.index(known["platform"]) < platformsOrdered.index(platform):
+                continue
+            entries[urlpath] = {"platform": platform, "status": 200, "time": store.stored(platform, urlpath)}
+        return entries
+
+    def resolved(self, urlpath):
+        """the platform whose page is on disk for that urlpath, or None"""
+        entry = self.entries.get(urlpath)
+        return entry["platform"] if entry else None
+
+    def knownFailure(self, urlpath, ttl):
+        """
+        the last status, if all platforms failed for urlpath less than ttl seconds ago,
+        and for good (404, 410); throttling or no answer is worth asking again next run
+        """
+        entry = self.entries.get(urlpath)
+        if (entry and entry["platform"] is None and entry["status"] in HttpCache.NEGATIVE_STATUSES
+                  and time.time() - entry["time"] < ttl):
+            return entry["status"]
+        return None
+
+    def record(self, urlpath, platform, status):
+        self.entries[urlpath] = {"platform": platform, "status": status, "time": time.time()}
+
+    def forget(self, urlpath):
+        self.entries.pop(urlpath, None)
+
+    def save(self):
+        saveJson(self.filename, self.entries)
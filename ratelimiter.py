@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+##############################################
+# ratelimiter.py
+#
+#   since 18/10/2026
+#
+#   token bucket, to keep concurrent downloads
+#      as polite as the serial NICENESS sleep.
+#   AdaptiveRateLimiter: the rate follows the
+#    server's answers (AIMD), within a floor
+#     and a ceiling, and obeys Retry-After.
+##############################################
+
+import time
+import datetime
+import threading
+import email.utils
+from urllib.parse import urlsplit
+
+
+class TokenBucket(object):
+    """
+    'rate' tokens per second, at most 'burst' of them saved up.
+    rate<=0 means unlimited, i.e. acquire() never waits.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.notBefore = 0.0 # paused until then, see pause()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def acquire(self):
+        """block until one token is available, then take it"""
+        if self.rate <= 0:
+            return
+        with self.lock: # holding the lock while sleeping queues up all other threads
+            now = time.monotonic()
+            if now < self.notBefore:
+                time.sleep(self.notBefore - now)
+                now = time.monotonic()
+            self.refill(now)
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.refill(time.monotonic())
+            self.tokens -= 1
+
+    def pause(self, seconds):
+        """no tokens for that many seconds (e.g. Retry-After); the rate afterwards stays"""
+        self.notBefore = max(self.notBefore, time.monotonic() + seconds)
+
+
+class HostRateLimiter(object):
+    """one TokenBucket per host, so each server gets its own politeness budget"""
+    def __init__(self, rate, burst=1):
+        self.rate, self.burst = rate, burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.local = threading.local() # seconds each thread waited, see waited()
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        started = time.monotonic()
+        self.bucket(url).acquire()
+        self.local.waited = self.waited() + time.monotonic() - started
+
+    def waited(self):
+        """seconds the calling thread spent in acquire(), all together"""
+        return getattr(self.local, "waited", 0.0)
+
+    def feedback(self, url, status, sent, seconds, retryAfter=None):
+        """the fixed rate doesn't listen; see AdaptiveRateLimiter"""
+        return None
+
+    def rates(self):
+        """{host: requests per second}, 0 = unlimited"""
+        with self.lock:
+            return {host: bucket.rate for host, bucket in self.buckets.items()}
+
+
+def retryAfterSeconds(value, now=None):
+    """seconds of a Retry-After header, which is either seconds or an HTTP date; None if neither"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    """
+    AIMD, like TCP: per host, each healthy answer adds 'increase' requests per second,
+    up to 'ceiling'. Throttling (429, 503), no answer at all, or answers getting
+    'latencyFactor' times slower than the fastest so far multiply the rate by 'decrease',
+    down to 'floor'; once per round, i.e. answers to requests sent before the last
+    decrease don't decrease it again. Retry-After pauses the host (at most 'maxPause').
+    """
+    THROTTLING = (429, 503)
+
+    def __init__(self, rate, floor, ceiling, increase, decrease, latencyFactor, maxPause, burst=1):
+        super().__init__(min(max(rate, floor), ceiling), burst)
+        self.floor, self.ceiling = floor, ceiling
+        self.increase, self.decrease = increase, decrease
+        self.latencyFactor, self.maxPause = latencyFactor, maxPause
+        self.hosts = {} # host: [smoothed seconds to first byte, fastest of those, perf_counter of last decrease]
+
+    def currentRate(self, url):
+        """requests per second that host gets now"""
+        return self.bucket(url).rate
+
+    def feedback(self, url, status, sent, seconds, retryAfter=None):
+        """
+        one answer: its status (None = no answer), perf_counter when it was sent, seconds
+        to the first byte, and the Retry-After header; returns (reason, new rate) if the rate changed
+        """
+        bucket = self.bucket(url)
+        pause = retryAfterSeconds(retryAfter) if status in self.THROTTLING else None
+        if pause:
+            bucket.pause(min(pause, self.maxPause))
+        with self.lock:
+            state = self.hosts.setdefault(urlsplit(url).netloc, [None, None, 0.0])
+            slow = False
+            if status is not None and status not in self.THROTTLING:
+                state[0] = seconds if state[0] is None else state[0] + 0.2 * (seconds - state[0])
+                state[1] = state[0] if state[1] is None else min(state[1], state[0])
+                slow = state[0] > self.latencyFactor * max(state[1], 0.001)
+            if status is None or status in self.THROTTLING or slow:
+                if sent < state[2]: # the last decrease was for this round already
+                    return None
+                state[2] = time.perf_counter()
+                reason, rate = "no answer" if status is None else "slow" if slow else str(status), \
+                               max(self.floor, bucket.rate * self.decrease)
+            else:
+                reason, rate = "healthy", min(self.ceiling, bucket.rate + self.increase)
+            if rate == bucket.rate:
+                return None
+            bucket.rate = rate # the next acquire() goes by it
+        return reason, rate
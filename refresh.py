@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+######################################################
+#  refresh.py
+#
+#   since 18/10/2026
+#
+#  scores on metacritic change, but the downloader
+#   never asks again for a page it has. This does:
+#    * only for stale pages (REFRESH_POLICY: newer
+#       games more often than old ones),
+#    * conditionally, so an unchanged page is a short
+#       '304 Not Modified' instead of 100 KB,
+#    * a changed page is parsed fully only if its
+#       metascore/userscore/review counts changed
+#        (or some of them are not on it anymore),
+#    * and those changes go into the changelogFile.
+######################################################
+
+import os
+import csv
+import time
+import datetime
+import argparse
+import collections
+import concurrent.futures
+import downloader
+import filesparser
+from httpcache import HttpCache
+from pagestore import openPageStore
+from metrics import openMetrics
+from settings import pageStore, platformsOrdered, metacriticUrl, httpCacheFile, changelogFile
+from settings import NEGATIVE_TTL, NICENESS, CONCURRENCY, PARSER_BACKEND, REFRESH_POLICY, REFRESH_DEFAULT
+
+RATING_FIELDS = ["metascore", "metascoreBased", "userscore", "userscoreBased"]
+
+
+def releasedDaysAgo(resultsDict, now):
+    """days since the release date on the page, or None if there is none"""
+    try:
+        released = datetime.datetime.strptime(resultsDict.get("released", ""), "%b %d, %Y")
+    except ValueError:
+        return None
+    return (now - released.timestamp()) / 86400
+
+
+def refreshAfterDays(releasedDays, policy=REFRESH_POLICY, default=REFRESH_DEFAULT):
+    if releasedDays is not None:
+        for releasedWithin, days in policy:
+            if releasedDays <= releasedWithin:
+                return days
+    return default
+
+
+def stalePages(store, cache, backend, now):
+    """
+    [(platform, urlpath, old resultsDict)] of all pages due for a refresh, oldest first;
+    old is None if the stored page can't be parsed
+    """
+    stale = []
+    for platform, urlpath in store.keys(platformsOrdered):
+        name = platform + "_" + urlpath + ".html"
+        old = cache.results(name) if cache else None
+        if not old: # never parsed yet
+            try:
+                old = filesparser.parseMetacriticPage(store.get(platform, urlpath), platform, urlpath, backend)[1]
+            except Exception: # a page filesparser can't read either; refresh it by the default age
+                old = None
+            else:
+                if cache:
+                    cache.put(name, store.fingerprint(platform, urlpath), old)
+        age = (now - store.stored(platform, urlpath)) / 86400
+        if age > refreshAfterDays(releasedDaysAgo(old or {}, now)):
+            stale.append((age, platform, urlpath, old))
+    return [(platform, urlpath, old) for age, platform, urlpath, old in sorted(stale, reverse=True)]
+
+
+def changedRatings(old, new):
+    """[(field, old, new)] of the rating fields that differ"""
+    return [(field, old.get(field), new.get(field)) for field in RATING_FIELDS if old.get(field) != new.get(field)]
+
+
+def writeChangelog(changes, filename=changelogFile):
+    """append [(platform, urlpath, field, old, new)], with date and delta"""
+    isNew = not os.path.exists(filename)
+    today = datetime.date.today().isoformat()
+    with open(filename, "a", newline='') as f:
+        csvwriter = csv.writer(f, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        if isNew:
+            csvwriter.writerow(["date", "platform", "urlpath", "field", "old", "new", "delta"])
+        for platform, urlpath, field, old, new in changes:
+            delta = round(new - old, 1) if isinstance(old, (int, float)) and isinstance(new, (int, float)) else ""
+            csvwriter.writerow([today, platform, urlpath, field, old, new, delta])
+
+
+def refresh(nice=NICENESS, concurrency=CONCURRENCY, backend=PARSER_BACKEND, dryRun=False):
+    """
+    ask metacritic again for all stale pages; returns the [(platform, urlpath, field, old, new)]
+    of all changed ratings
+    """
+    started = time.monotonic()
+    store = openPageStore(pageStore)
+    cache = filesparser.openParseCache(backend)
+    httpCache = HttpCache(httpCacheFile, NEGATIVE_TTL) if httpCacheFile else None
+    metrics = openMetrics()
+    stale = stalePages(store, cache, backend, time.time())
+    print ("%d stored pages are due for a refresh." % len(stale))
+    if dryRun or not stale:
+        store.close()
+        return []
+
+    workers = max(1, concurrency)
+    session = downloader.makeSession(poolsize=workers)
+    limiter = downloader.makeRateLimiter(nice)
+    changes = []
+
+    def fetch(platform, urlpath, old):
+        url = metacriticUrl + "/" + platform + "/" + urlpath
+        earlierPage = store.get(platform, urlpath)
+        # a page that can't be parsed is asked for unconditionally: '304 Not Modified' would keep it
+        page = downloader.fetchPage(url, session, httpCache, limiter, earlierPage if old else None, metrics)
+        return earlierPage, page
+
+    def handle(platform, urlpath, old, future):
+        name = platform + "_" + urlpath + ".html"
+        try:
+            earlierPage, page = future.result()
+        except Exception as e:
+            metrics.count("refresh: no answer")
+            print ("%s %s: no answer (%r), try again next time" % (platform, urlpath, e))
+            return
+        if page.status_code != 200: # keep the old page; due again next time
+            metrics.count("refresh: status %s" % page.status_code)
+            print ("%s %s: status %s, keeping the old page" % (platform, urlpath, page.status_code))
+            return
+        if old is None: # nothing to compare with: parse the new page fully
+            try:
+                results = filesparser.parseMetacriticPage(page.text, platform, urlpath, backend)[1]
+            except Exception as e:
+                if page.text == earlierPage: # unchanged, so not again before the default age
+                    store.touch(platform, urlpath)
+                metrics.count("refresh: parse failed")
+                print ("%s %s: could not parse the new page either (%r), try again next time" % (platform, urlpath, e))
+                return
+            if page.text != earlierPage:
+                store.put(platform, urlpath, page.text)
+            metrics.count("refresh: parsed at last")
+            print ("%s %s: parsed at last" % (platform, urlpath))
+        elif page.text == earlierPage: # '304 Not Modified' comes back as the earlier page
+            store.touch(platform, urlpath)
+            metrics.count("refresh: not modified")
+            results = old
+        else:
+            try:
+                ratings = filesparser.parseRatings(page.text, platform, urlpath, filesparser.parserBackend(backend),
+                                                 filesparser.fieldExtractor(backend))
+                # a rating not on the old or the new page has its default there: no change to log
+                missing = set(ratings.get("failedFields", {}))
+                wasMissing = set(old.get("failedFields", {})) & set(RATING_FIELDS)
+                changed = [change for change in changedRatings(old, ratings) if change[0] not in missing | wasMissing]
+                if changed or missing != wasMissing: # also so that the parse cache knows which are missing
+                    results = filesparser.parseMetacriticPage(page.text, platform, urlpath, backend)[1]
+            except Exception as e:
+                metrics.count("refresh: parse failed")
+                print ("%s %s: could not parse the new page (%r), keeping the old one" % (platform, urlpath, e))
+                return
+            store.put(platform, urlpath, page.text)
+            if missing:
+                metrics.count("refresh: ratings missing")
+                print ("%s %s: not on the new page: %s" % (platform, urlpath, ", ".join(sorted(missing))))
+            if changed:
+                metrics.count("refresh: ratings changed")
+                changes.extend((platform, urlpath, field, before, after) for field, before, after in changed)
+                print ("%s %s: %s" % (platform, urlpath, ", ".join("%s %s -> %s" % c for c in changed)))
+            elif missing == wasMissing: # something else on the page changed, not worth a full parse
+                metrics.count("refresh: ratings unchanged")
+                results = old
+        if cache and results is old: # not parsed again, so from the parser version it came from
+            cache.move(name, store.fingerprint(platform, urlpath))
+        elif cache:
+            cache.put(name, store.fingerprint(platform, urlpath), results)
+
+    try:
+        # requests in flight in a window, but handled in order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            window = collections.deque()
+            for platform, urlpath, old in stale:
+                window.append((platform, urlpath, old, pool.submit(fetch, platform, urlpath, old)))
+                while len(window) > 2 * workers:
+                    handle(*window.popleft())
+            while window:
+                handle(*window.popleft())
+    finally: # keep what was refreshed when interrupted
+        if changes:
+            writeChangelog(changes)
+        if cache:
+            cache.save()
+        if httpCache:
+            httpCache.save()
+        session.close()
+        store.close()
+    print ("\nREADY. %d pages refreshed, %d ratings changed, in %.1f seconds."
+           % (len(stale), len(changes), time.monotonic() - started))
+    if changes:
+        print ("changes appended to:", changelogFile)
+    metrics.summary("refresh")
+    metrics.close()
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="download stale pages again, and log changed ratings")
+    parser.add_argument("--dry-run", action="store_true", help="only count the stale pages")
+    args = parser.parse_args()
+    refresh(dryRun=args.dry_run)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+######################################################
+#  resultstable.py
+#
+#   since 18/10/2026
+#
+#  all parse results as columns instead of one dict
+#   per game: the scores in compact typed arrays,
+#    the texts in lists, in the order of COLUMN_ORDER.
+#  Sorting and filtering by metascore/userscore is then
+#   done on one array, and the whole table is written
+#    in bulk as csv, SQLite, or (with pyarrow) Parquet
+#     or Feather.
+######################################################
+
+import os
+import csv
+import glob
+import array
+import sqlite3
+
+NUMERIC_COLUMNS = {"metascore": "q", "metascoreBased": "q", # array typecodes: int64,
+                   "userscore": "d", "userscoreBased": "q"} # and float64 for 7.5 etc.
+
+SQL_TYPES = {"q": "INTEGER", "d": "REAL"}
+
+
+class ResultsTable(object):
+    """one column per field; numbers in array.array, texts in lists"""
+
+    def __init__(self, columns):
+        self.names = [c for c in columns if c != ""] # '' is only a spacer in the csv
+        self.columns = {name: array.array(NUMERIC_COLUMNS[name]) if name in NUMERIC_COLUMNS else []
+                        for name in self.names}
+
+    @classmethod
+    def fromResults(cls, filename2results, columns):
+        """from the {key: resultsDict} of the parser"""
+        table = cls(columns)
+        for name, column in table.columns.items():
+            default = 0 if name in NUMERIC_COLUMNS else ""
+            column.extend(r.get(name, default) for r in filename2results.values())
+        return table
+
+    @classmethod
+    def fromCsv(cls, filename):
+        """read back a csv written by toCsv / saveResults"""
+        with open(filename, newline='') as f:
+            reader = csv.reader(f, delimiter='\t', quotechar='"')
+            header = next(reader)
+            table = cls(header)
+            convert = {name: int if typecode == "q" else float for name, typecode in NUMERIC_COLUMNS.items()}
+            for row in reader:
+                for name, value in zip(header, row):
+                    if name:
+                        table.columns[name].append(convert[name](value or 0) if name in convert else value)
+        return table
+
+    def __len__(self):
+        return len(self.columns[self.names[0]]) if self.names else 0
+
+    def column(self, name):
+        return self.columns[name]
+
+    def addColumn(self, name, values):
+        """one more (text) column, e.g. Y/N per genre group"""
+        self.names.append(name)
+        self.columns[name] = list(values)
+
+    def numpy(self, name):
+        """a numpy view (no copy) of a numeric column"""
+        import numpy
+        return numpy.frombuffer(self.columns[name], dtype="int64" if self.columns[name].typecode == "q" else "float64")
+
+    def take(self, indices):
+        """a new table with only those rows, in that order"""
+        table = ResultsTable(self.names)
+        for name, column in self.columns.items():
+            table.columns[name].extend(column[i] for i in indices)
+        return table
+
+    def sortedBy(self, name, descending=True):
+        column = self.columns[name]
+        return self.take(sorted(range(len(self)), key=column.__getitem__, reverse=descending))
+
+    def where(self, name, condition):
+        """e.g. table.where("metascore", lambda ms: ms >= 80)"""
+        column = self.columns[name]
+        return self.take([i for i in range(len(self)) if condition(column[i])])
+
+    def rows(self, columns=None):
+        """row tuples; columns may contain '' spacers, which stay empty"""
+        empty = [""] * len(self)
+        return zip(*[self.columns[c] if c else empty for c in (columns or self.names)])
+
+    def toCsv(self, filename, columns=None):
+        """tab separated, like saveResults always wrote it"""
+        columns = columns or self.names
+        with open(filename, "w", newline='') as f:
+            csvwriter = csv.writer(f, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csvwriter.writerow(columns)
+            csvwriter.writerows(self.rows(columns))
+
+    def toSqlite(self, filename, table="results"):
+        """one table, typed columns; replaces an earlier table of that name"""
+        db = sqlite3.connect(filename)
+        with db:
+            db.execute('DROP TABLE IF EXISTS "%s"' % table)
+            db.execute('CREATE TABLE "%s" (%s)' % (table, ", ".join(
+                '"%s" %s' % (name, SQL_TYPES.get(NUMERIC_COLUMNS.get(name), "TEXT")) for name in self.names)))
+            db.executemany('INSERT INTO "%s" VALUES (%s)' % (table, ", ".join("?" * len(self.names))), self.rows())
+        db.close()
+
+    def toArrow(self):
+        """a pyarrow.Table (pip3 install pyarrow)"""
+        import pyarrow
+        return pyarrow.table({name: self.numpy(name) if name in NUMERIC_COLUMNS else self.columns[name]
+                              for name in self.names})
+
+    def toParquet(self, filename):
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(self.toArrow(), filename)
+
+    def toFeather(self, filename):
+        import pyarrow.feather
+        pyarrow.feather.write_feather(self.toArrow(), filename)
+
+
+EXPORTERS = {"csv": ResultsTable.toCsv, "sqlite": ResultsTable.toSqlite,
+             "parquet": ResultsTable.toParquet, "feather": ResultsTable.toFeather}
+
+
+def exportResults(table, basename, formats, columns=None):
+    """write the table once per format, into basename + .csv/.sqlite/...; returns the filenames"""
+    filenames = []
+    for format in formats:
+        fn = basename + "." + format
+        if format == "csv":
+            table.toCsv(fn, columns)
+        else:
+            EXPORTERS[format](table, fn)
+        filenames.append(fn)
+    return filenames
+
+
+def newestResults(folder):
+    """the newest results csv that filesparser.py saved into that folder, or None"""
+    results = [fn for fn in glob.glob(os.path.join(folder, "MyEpicGamesOnMetacritic-*.csv"))
+               if not fn.endswith("_groups.csv")]
+    return max(results, key=os.path.getmtime) if results else None
@@ -29,6 +29,8 @@ metacriticUrl="https://www.metacritic.com/game"
 platformsOrdered = ["pc", "playstation-4", "switch"]
 
 # for generating URLPATH automatically:
+# (these lists, down to NAMES_IGNORER, may also be edited at runtime, e.g. in
+#  interactive/tweaker.ipynb; downloader.simplifyTitle takes the edits from the next call on)
 REMOVE_CHARS = (".", ":", "'", ",", '"')
 
 REPLACERS = [
@@ -106,6 +108,22 @@ NAMES_IGNORER = ["PUBG Founder's Pack",
                  'Total War: WARHAMMER - Assembly Kit',
                  ]
 
+# When a guessed urlpath fails on all platforms, ask for the most similar
+# known slug (pages in the pageStore, the platformIndexFile, NAMES_MAPPER,
+# slugListFile) instead, if at least this similar (0..1, trigrams of the
+# words), e.g. 0.6; finds editions, demos, ... without a NAMES_MAPPER entry.
+# Check the "SIMILAR" lines of the output. None = only ask for the guess.
+FUZZY_THRESHOLD = None
+# these words don't tell games apart, so they are ignored when comparing
+FUZZY_NOISE_WORDS = ["the", "a", "of", "edition", "editio", "deluxe", "complete", "standard", "digital",
+                     "definitive", "ultimate", "gold", "premium", "goty", "demo", "dlc", "bundle", "pack"]
+# these do: a slug is only similar if it has the same of them, and the same
+# numbers (roman ones too), so a sequel or a remaster never becomes the original
+FUZZY_DISTINGUISHING_WORDS = ["remastered", "remaster", "remake", "remade", "reforged", "reloaded", "redux",
+                              "sequel", "prequel", "returns", "origins", "hd", "vr"]
+# optional: more known slugs, one "platform/urlpath" (or just "urlpath") per line
+slugListFile = None
+
 # headers needed, to avoid the 'TooManyRedirects: Exceeded 30 redirects'
 # https://stackoverflow.com/a/42240682
 headers = {
@@ -128,9 +146,94 @@ TIMEOUT = 5
 #  150 games that means just three minutes of your life.  Once. Patience!)
 NICENESS = 1.0 # in seconds. 
 
+# Optional concurrent downloads: number of worker threads (= cap on requests
+# in flight). 0 means the classic serial loop above. Even when concurrent, all
+# requests share a token bucket of 1/NICENESS requests per second per host,
+# so metacritic sees no more traffic per second than before - we just stop
+# idling while waiting for slow responses.
+CONCURRENCY = 0
+RATE_BURST = 1 # how many requests may go out back-to-back after an idle phase
+
+# Adaptive rate (AIMD, like TCP), serial or concurrent: start at 1/NICENESS
+# requests per second per host, add RATE_INCREASE after each healthy answer;
+# on 429/503, a timeout, or answers much slower than before, multiply by
+# RATE_DECREASE instead. Always between RATE_FLOOR and RATE_CEILING, and a
+# Retry-After header pauses that host as long as asked (up to RETRY_AFTER_MAX
+# seconds). False = the fixed NICENESS above. NICENESS = 0 stays unlimited.
+ADAPTIVE_RATE = True
+RATE_FLOOR = 0.2            # requests per second; never slower than that
+RATE_CEILING = 4.0          # and never faster, however healthy the answers
+RATE_INCREASE = 0.05        # requests per second, added per healthy answer
+RATE_DECREASE = 0.5         # factor, at most once per round of requests in flight
+RATE_LATENCY_FACTOR = 3.0   # 'much slower' = time to first byte this many times the fastest so far
+RETRY_AFTER_MAX = 300       # in seconds
+THROTTLED_RETRIES = 2       # a throttled request is asked again that often, before the next platform
+
+# Re-runs remember every 404 for this long, and don't ask metacritic again
+# (e.g. while probing pc, then playstation-4, then switch). None = no cache.
+httpCacheFile = "metacritic_httpcache.json"
+NEGATIVE_TTL = 30 * 24 * 3600 # in seconds
+
+# Which platform resolved each urlpath, or that all of them failed (which, if
+# with 404 or 410, is then also not retried for NEGATIVE_TTL; 429, 503 or no
+# answer are asked again next run). None = look at the folder each time.
+platformIndexFile = "metacritic_index.json"
+
+# State of every title (pending, in-flight, done, failed, ignored), committed
+# as the downloader goes: an interrupted run resumes, and
+#   python3 downloader.py --retry-failures
+# only tries the failed titles again. None = no job queue.
+jobQueueFile = "metacritic_jobs.sqlite"
+# when a failed title is due again, by the HTTP status of its last platform:
+# (attempts at most, seconds until the first retry; doubles after each one)
+RETRY_POLICY = {
+    404: (3, NEGATIVE_TTL), # not on metacritic (yet); also when the httpCache forgets the 404
+    410: (1, 0),            # gone
+    429: (8, 60),           # too many requests
+    503: (8, 60),           # service unavailable
+    None: (5, 300),         # no answer: timeout, connection error
+}
+DEFAULT_RETRY = (5, 3600)   # all other statuses
+
 # store all HTML pages locally
 downloadsFolder = "metacritic"
 
+# where the pages are kept: a folder (one .html file per page, as above), or a
+# "*.sqlite" file (compressed, for big libraries). To move existing pages there:
+#   python3 pagestore.py metacritic metacritic.sqlite
+pageStore = downloadsFolder
+
+# "html5lib" (default, pure python) or "lxml" (much faster, needs: pip3 install lxml)
+PARSER_BACKEND = "html5lib"
+
+# Find the fields with the declarative spec in fieldspec.py (compiled once; a
+# field that is not on a page is reported, and gets its default, instead of
+# failing the whole page). It replaces the parse* functions of the backend
+# (filesparser.py, lxmlparser.py); False = use those.
+FIELD_SPEC = True
+
+# parse results of each page, so re-runs only parse new or changed pages; all pages
+# are parsed again after a change of PARSER_BACKEND, FIELD_SPEC or of the parser
+# code. None = no cache.
+parseCacheFile = "metacritic_parsecache.json"
+
+# refresh.py downloads a stored page again when it is older than this many
+# days, depending on how many days ago the game was released (newest first):
+REFRESH_POLICY = [(90, 7), (365, 30), (3 * 365, 90)]
+REFRESH_DEFAULT = 365 # days, for older games, and unknown release dates
+# and appends every changed score here (tab separated)
+changelogFile = "metacritic_changelog.tsv"
+
+# pipeline.py: at most that many downloaded pages wait for a free parser
+PIPELINE_QUEUE = 16
+
+# per-stage timers and counters (requests per platform, status codes, bytes,
+# parse ms per page, cache hits), summed up in a table at the end of each run.
+# False = off (then nothing is measured at all).
+METRICS = True
+# plus one JSON line per request and per parsed page, appended. None = only the table.
+metricsFile = "metacritic_metrics.ndjson"
+
 # in which order you want the resulting CSV:
 COLUMN_ORDER=['game', '', 'metascore', 'metascoreBased', '',
               'userscore', 'userscoreBased', '',
@@ -138,4 +241,28 @@ COLUMN_ORDER=['game', '', 'metascore', 'metascoreBased', '',
               'developer', 'publisher', '',
               'genres']
 
-EMPTY_COLUMNS = True # only cosmetic, to cluster column topics
\ No newline at end of file
+EMPTY_COLUMNS = True # only cosmetic, to cluster column topics
+
+# saveResults writes the table in these formats: "csv", "sqlite",
+# and with pyarrow installed also "parquet" and "feather"
+RESULTS_FORMATS = ["csv"]
+
+# analytics.py: the ~75 metacritic genres (as in the csv, without spaces)
+# grouped into a few genre groups, one Y/N column each. A genre may be in
+# more than one group; genres in none of them count as "Other".
+GENRE_GROUPS = {
+    "Action":     ["Action", "ActionAdventure", "Arcade", "Beat-'Em-Up", "Fighting", "Platformer",
+                   "Metroidvania", "Shoot-'Em-Up", "Combat", "2D", "3D"],
+    "Shooter":    ["Shooter", "First-Person", "Third-Person", "Tactical", "Team"],
+    "RPG":        ["Role-Playing", "RPG", "ActionRPG", "PC-styleRPG", "Japanese-Style", "Western-Style",
+                   "Roguelike", "MassivelyMultiplayer", "MassivelyMultiplayerOnline", "MOBA", "Fantasy"],
+    "Adventure":  ["Adventure", "ActionAdventure", "Point-and-Click", "VisualNovel", "Open-World",
+                   "Survival", "Horror", "Sandbox", "Linear"],
+    "Strategy":   ["Strategy", "4X", "Real-Time", "Turn-Based", "Tactics", "Command", "Defense",
+                   "Government", "Historic", "Modern", "Top-Down"],
+    "Simulation": ["Simulation", "VirtualLife", "Virtual", "Vehicle", "Flight", "Train", "Space",
+                   "LargeSpaceship", "Marine", "Civilian", "Automobile", "Career"],
+    "Management": ["Management", "Business/Tycoon", "Tycoon", "CityBuilding"],
+    "Sports":     ["Sports", "Racing", "Soccer", "Basketball", "Pinball"],
+    "Puzzle":     ["Puzzle", "Matching", "Board/CardGame", "CardBattle"],
+}
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+######################################################
+#  slugresolver.py
+#
+#   since 18/10/2026
+#
+#  a wrong urlpath guess costs one 404 per platform.
+#  So: an offline index of the metacritic slugs we know
+#   exist (pages in the pageStore, NAMES_MAPPER, the
+#    platform index, an optional slug list), and for a
+#     guess that is not among them, the most similar
+#      known slug, by trigrams of the normalised words;
+#       the downloader asks for it only after the guess
+#        failed on all platforms.
+#  Numbers (also roman ones) and words like 'remastered'
+#   must agree, so 'game-2' never becomes 'game-3', nor
+#    'game-ii' or 'game-remastered' become 'game'.
+######################################################
+
+import re
+import collections
+
+NOT_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+# 'i' is left out: more often the word than the number
+ROMAN_NUMERALS = {"ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8", "ix": "9",
+                  "x": "10", "xi": "11", "xii": "12", "xiii": "13", "xiv": "14", "xv": "15", "xvi": "16"}
+
+
+def words(urlpath, noiseWords):
+    """'Godfall---Challenger-Edition™' -> ['godfall', 'challenger'] (with 'edition' a noise word)"""
+    return [word for word in NOT_ALPHANUMERIC.split(urlpath.lower()) if word and word not in noiseWords]
+
+
+def trigrams(wordList):
+    text = " " + " ".join(wordList) + " "
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+def distinguishing(wordList, distinguishingWords=()):
+    """the numbers ('ii' as '2') and distinguishing words, e.g. 'remastered': two games if these differ"""
+    return frozenset(ROMAN_NUMERALS.get(word, word) for word in wordList
+                     if word.isdigit() or word in ROMAN_NUMERALS or word in distinguishingWords)
+
+
+class SlugResolver(object):
+    """known slug -> platforms it was seen on; resolve(guess) -> the slug to ask for"""
+
+    def __init__(self, threshold, noiseWords=(), distinguishingWords=()):
+        self.threshold = threshold
+        self.noiseWords = frozenset(noiseWords)
+        self.distinguishingWords = frozenset(distinguishingWords)
+        self.platforms = collections.defaultdict(list) # slug: [platform, ..] (may be empty)
+        self.slugs = []                                # id: (slug, trigrams, distinguishing)
+        self.postings = collections.defaultdict(list)  # trigram: [id, ..]
+
+    def add(self, slug, platform=None):
+        if slug not in self.platforms:
+            wordList = words(slug, self.noiseWords)
+            grams = trigrams(wordList)
+            for gram in grams:
+                self.postings[gram].append(len(self.slugs))
+            self.slugs.append((slug, len(grams), distinguishing(wordList, self.distinguishingWords)))
+        if platform and platform not in self.platforms[slug]:
+            self.platforms[slug].append(platform)
+
+    def addSlugList(self, filename):
+        """one 'platform/urlpath' or 'urlpath' per line, e.g. from a sitemap"""
+        with open(filename) as f:
+            for line in f:
+                platform, _, slug = line.strip().rpartition("/")
+                if slug:
+                    self.add(slug, platform or None)
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def __contains__(self, slug):
+        return slug in self.platforms
+
+    def bestMatch(self, guess):
+        """(slug, similarity) of the most similar known slug with the same distinguishing words, or (None, 0)"""
+        wordList = words(guess, self.noiseWords)
+        grams = trigrams(wordList)
+        guessDistinguishing = distinguishing(wordList, self.distinguishingWords)
+        shared = collections.Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best, bestScore = None, 0.0
+        for i, n in shared.items():
+            slug, size, slugDistinguishing = self.slugs[i]
+            score = 2.0 * n / (len(grams) + size) # Dice coefficient
+            if score > bestScore and slugDistinguishing == guessDistinguishing:
+                best, bestScore = slug, score
+        return best, bestScore
+
+    def resolve(self, guess):
+        """(urlpath, similarity): the guess if known (or nothing similar enough), else the best match"""
+        if guess in self.platforms:
+            return guess, 1.0
+        slug, score = self.bestMatch(guess)
+        if slug is not None and score >= self.threshold:
+            return slug, score
+        return guess, 0.0
+
+    def platformOrder(self, slug, platformsOrdered):
+        """the platforms the slug is known on first, then the others"""
+        known = [platform for platform in platformsOrdered if platform in self.platforms.get(slug, ())]
+        return known + [platform for platform in platformsOrdered if platform not in known]
+
+
+def buildSlugResolver(threshold, noiseWords, distinguishingWords, store, platformsOrdered, namesMapper,
+                      index=None, slugListFile=None):
+    """all slugs we know exist: stored pages, NAMES_MAPPER, the PlatformIndex, a slug list"""
+    resolver = SlugResolver(threshold, noiseWords, distinguishingWords)
+    for platform, urlpath in store.keys(platformsOrdered):
+        resolver.add(urlpath, platform)
+    if index:
+        for urlpath, entry in index.entries.items():
+            if entry["platform"]:
+                resolver.add(urlpath, entry["platform"])
+    for urlpath in namesMapper.values():
+        resolver.add(urlpath)
+    if slugListFile:
+        resolver.addSlugList(slugListFile)
+    return resolver
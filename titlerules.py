@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+######################################################
+#  titlerules.py
+#
+#   since 18/10/2026
+#
+#  the title rules of settings.py (REMOVE_CHARS,
+#   REPLACERS, REMOVE_SENTENCES, NAMES_MAPPER and
+#    NAMES_IGNORER), compiled once. Was in downloader.py;
+#     on its own it needs neither requests nor the
+#      settings, so config.py can compile it up front.
+######################################################
+
+import re
+import copy
+
+
+def trieRegex(strings):
+    """
+    regex that matches any of those strings, with common prefixes merged
+    (a trie), so the regex engine doesn't try every string at every position
+    """
+    trie = {}
+    for string in strings:
+        node = trie
+        for ch in string:
+            node = node.setdefault(ch, {})
+        node[""] = True # a string ends here
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and "" not in node:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")" + ("?" if "" in node else "")
+
+    return build(trie)
+
+
+def rulesContent(removeChars, replacers, removeSentences, namesMapper, namesIgnorer):
+    """the rule lists as lists and a dict, so they compare by content; not copied if they are those already"""
+    def asList(values):
+        return values if type(values) is list else list(values)
+    return (asList(removeChars), asList(replacers), asList(removeSentences),
+            namesMapper if type(namesMapper) is dict else dict(namesMapper), asList(namesIgnorer))
+
+
+class TitleRules(object):
+    """
+    the title rules of settings.py, compiled once:
+    a frozenset for the ignored names, one (trie shaped) regex that tells
+    whether any of the sentences occurs at all, a str.translate table for the removed characters,
+    and a memo of all titles seen. simplify() gives exactly what the plain
+    loops over the rules gave, just without running every rule on every title.
+    """
+    def __init__(self, removeChars, replacers, removeSentences, namesMapper, namesIgnorer):
+        self.content = tuple(copy.copy(rules) for rules in
+                             rulesContent(removeChars, replacers, removeSentences, namesMapper, namesIgnorer))
+        self.namesIgnorer = frozenset(namesIgnorer)
+        self.namesMapper = dict(namesMapper)
+        self.removeSentences = tuple(removeSentences)
+        self.anySentence = re.compile(trieRegex(self.removeSentences)) if self.removeSentences else None
+        if all(len(rem) == 1 for rem in removeChars):
+            self.deleteChars, self.removeChars = str.maketrans("", "", "".join(removeChars)), ()
+        else: # longer strings: keep removing them one after the other
+            self.deleteChars, self.removeChars = None, tuple(removeChars)
+        self.replacers = tuple(tuple(r) for r in replacers)
+        self.memo = {}
+
+    def compiledFrom(self, removeChars, replacers, removeSentences, namesMapper, namesIgnorer):
+        """whether these lists still have the content this was compiled from"""
+        return self.content == rulesContent(removeChars, replacers, removeSentences, namesMapper, namesIgnorer)
+
+    def simplify(self, name):
+        try:
+            return self.memo[name]
+        except KeyError:
+            result = self.memo[name] = self.compute(name)
+            return result
+
+    def compute(self, name):
+        # non automated = some games are just not there, on metacritic:
+        if name in self.namesIgnorer:
+            return False
+
+        # non automated = manually assign urlpaths to game names:
+        if name in self.namesMapper:
+            return self.namesMapper[name]
+
+        # semi automated = by dropping parts of the game names:
+        # (in order, as one removal can create the next match; but only if any occurs)
+        if self.anySentence and self.anySentence.search(name):
+            for sentence in self.removeSentences:
+                name = name.replace(sentence,"")
+
+        # automated = rules based characters replacement, etc
+        if self.deleteChars:
+            name = name.translate(self.deleteChars)
+        for rem in self.removeChars:
+            name = name.replace(rem,"")
+
+        name=name.lower()
+        name=name.strip()
+
+        for find, replace in self.replacers:
+            name = name.replace(find,replace)
+
+        return name